@@ -0,0 +1,36 @@
+import argparse
+import json
+from typing import Any, Dict
+
+
+def _load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {r["key"]: r for r in data["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("-t", "--threshold", type=float, default=1.10,
+                        help="flag cases whose time ratio candidate/baseline exceeds this")
+    args = parser.parse_args()
+
+    base = _load(args.baseline)
+    cand = _load(args.candidate)
+    regressions = 0
+    for key in sorted(base.keys() & cand.keys()):
+        ratio = cand[key]["min"] / base[key]["min"] if base[key]["min"] > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:60s} {base[key]['min'] * 1e3:10.3f} ms {cand[key]['min'] * 1e3:10.3f} ms {ratio:7.2f}x{flag}")
+    for key in sorted(base.keys() - cand.keys()):
+        print(f"{key:60s} missing from {args.candidate}")
+    print(f"{regressions} regression(s) above {args.threshold:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random as rand
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from ookami import CombSet, clear_shared_cache, compute_powerset_info, rand_ap, rand_gp, rand_sets
+
+SIZES = (50, 200, 1000)
+QUICK_SIZES = (50, 200)
+POWERSET_RUNS = ((10, 1), (12, 1), (12, 2), (14, 2))
+QUICK_POWERSET_RUNS = ((10, 1), (12, 2))
+
+
+def _make_set(regime: str, size: int) -> CombSet:
+    if regime == "ap":
+        return rand_ap(1, 3, size)
+    if regime == "gp":
+        return rand_gp(1, 3, min(size, 60))
+    if regime == "dense":
+        return rand_sets(1, size, 0, 4 * size)[0]
+    if regime == "sparse":
+        return rand_sets(1, size, 0, 2**40)[0]
+    raise ValueError(f"unknown regime {regime!r}")
+
+
+def _time(setup: Callable[[], Any], op: Callable[[Any], Any], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        clear_shared_cache()
+        arg = setup()
+        t0 = timeit.default_timer()
+        op(arg)
+        times.append(timeit.default_timer() - t0)
+    return times
+
+
+def _fresh(S: CombSet) -> Callable[[], CombSet]:
+    return lambda: CombSet(S._set.copy())
+
+
+def _set_cases(sizes: Tuple[int, ...]) -> List[Tuple[str, Dict[str, Any], Callable[[], Any], Callable[[Any], Any]]]:
+    cases = []
+    for regime in ("ap", "gp", "dense", "sparse"):
+        for size in sizes:
+            S = _make_set(regime, size)
+            T = _make_set(regime, size)
+            params = {"regime": regime, "size": S.cardinality}
+            pair = lambda S=S, T=T: (CombSet(S._set.copy()), CombSet(T._set.copy()))
+            cases.append(("sumset", params, pair, lambda p: p[0] + p[1]))
+            cases.append(("difference_set", params, pair, lambda p: p[0] - p[1]))
+            cases.append(("product_set", params, pair, lambda p: p[0] * p[1]))
+            cases.append(("rep_add", params, _fresh(S), lambda A: A.rep_add(int(A._set[0] + A._set[-1]))))
+            cases.append(("energy_add", params, _fresh(S), lambda A: A.energy_add))
+            cases.append(("energy_mult", params, _fresh(S), lambda A: A.energy_mult))
+            if size <= 50 or (size <= 200 and regime in ("ap", "dense")):
+                cases.append(("rmul_4", params, _fresh(S), lambda A: 4 * A))
+                cases.append(("k_energy_mult_3", params, _fresh(S), lambda A: A.k_energy_mult(3)))
+                cases.append(("info_3", params, _fresh(S), lambda A: A.info(3)))
+    return cases
+
+
+def _powerset_cases(runs: Tuple[Tuple[int, int], ...], out_dir: str) -> List[Tuple[str, Dict[str, Any], Callable[[], Any], Callable[[Any], Any]]]:
+    cases = []
+    for n, jobs in runs:
+        for minimal in (False, True):
+            path = os.path.join(out_dir, f"powerset_{n}_{jobs}_{int(minimal)}")
+
+            def setup(path: str = path) -> str:
+                shutil.rmtree(path, ignore_errors=True)
+                return path
+
+            def op(path: str, n: int = n, jobs: int = jobs, minimal: bool = minimal) -> None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    compute_powerset_info(n, path, jobs, 4, 4000, minimal)
+
+            cases.append(("compute_powerset_info", {"n": n, "jobs": jobs, "minimal": minimal}, setup, op))
+    return cases
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(quick: bool = False, repeat: int = 5, match: Optional[str] = None, seed: int = 0) -> Dict[str, Any]:
+    rand.seed(seed)
+    out_dir = tempfile.mkdtemp(prefix="ookami_bench_")
+    try:
+        cases = _set_cases(QUICK_SIZES if quick else SIZES)
+        cases += _powerset_cases(QUICK_POWERSET_RUNS if quick else POWERSET_RUNS, out_dir)
+        results = []
+        for name, params, setup, op in cases:
+            key = name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+            if match is not None and match not in key:
+                continue
+            times = _time(setup, op, 1 if name == "compute_powerset_info" and quick else repeat)
+            result = {
+                "name": name,
+                "params": params,
+                "key": key,
+                "repeat": len(times),
+                "min": min(times),
+                "median": statistics.median(times),
+                "mean": statistics.fmean(times),
+            }
+            if name == "compute_powerset_info":
+                result["subsets_per_second"] = ((1 << params["n"]) - 1) / result["min"]
+            results.append(result)
+            print(f"{key:60s} {result['min'] * 1e3:10.3f} ms")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return {"meta": _metadata(), "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time CombSet operations and powerset sweeps.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="where to write the JSON results")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed repetitions per case; the minimum is reported")
+    parser.add_argument("-k", "--match", default=None, help="only run cases whose key contains this string")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and sweeps")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = run(args.quick, args.repeat, args.match, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print(f"wrote {len(data['results'])} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@ import getopt, sys
 from ookami import CombSet
 
 args = sys.argv[1:]
-options = "sSnN"
-long_options = ["set", "num"]
+options = "sSnNcC"
+long_options = ["set", "num", "counts"]
+
+counts_only = any(a in ("-c", "-C", "--counts") for a in args)
+args = [a for a in args if a not in ("-c", "-C", "--counts")]
 
 num = 1
 try:
@@ -23,13 +26,18 @@ try:
 except getopt.error as err:
     print(str(err))
 
-if isinstance(s, list):
+if isinstance(s, list) and counts_only:
     S = CombSet(s)
-    computed = []
-    if num > 1:
-        for i in range(2, num+1):
-            computed.append(i*S)
-            
+    for i, count in enumerate(S.iter_sumsets(num, counts=True), 1):
+        print("|" + str(i) + "*S| = " + str(count), flush=True)
+    growth = S.linear_growth(num)
+    if growth is not None:
+        slope, constant, start = growth
+        sign = " + " if constant >= 0 else " - "
+        print("|k*S| = " + str(slope) + "*k" + sign + str(abs(constant)) + " for k >= " + str(start))
+elif isinstance(s, list):
+    S = CombSet(s)
+
     print("S = " + str(list(S._set)))
     print("Cardinality of S: " + str(S.cardinality))
     print("Diameter of S: " + str(S.diameter))
@@ -41,5 +49,6 @@ if isinstance(s, list):
     print("Multiplicative energy: " + str(S.energy_mult))
     if num > 1:
         print("iS for 2 <= i <= " + str(num) + ": ")
-        for i in range(0, len(computed)):
-            print("  " + str(i+2) + "*S = " + str(computed[i]))
+        for i, iS in enumerate(S.iter_sumsets(num), 1):
+            if i > 1:
+                print("  " + str(i) + "*S = " + str(iS), flush=True)
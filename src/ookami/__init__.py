@@ -1,4 +1,8 @@
-from .combset import CombSet
-from .tools import compute_powerset_info, rand_sums, rand_sets, rand_ap, rand_gp
+from .combset import CombSet, get_options, set_options
+from .batch import batch_info
+from .cache import cache_stats, clear_shared_cache, set_cache_limit
+from .bitset import BitSet
+from .store import InvariantStore, close_store, open_store
+from .tools import compute_powerset_info, load_powerset_info, search_powerset, rand_sums, rand_sum_stats, rand_sets, rand_ap, rand_gp
 
-__all__ = ["CombSet", "compute_powerset_info", "rand_sums", "rand_sets", "rand_ap", "rand_gp"]
+__all__ = ["CombSet", "get_options", "set_options", "batch_info", "cache_stats", "clear_shared_cache", "set_cache_limit", "BitSet", "InvariantStore", "close_store", "open_store", "compute_powerset_info", "load_powerset_info", "search_powerset", "rand_sums", "rand_sum_stats", "rand_sets", "rand_ap", "rand_gp"]
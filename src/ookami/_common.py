@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import random as rand
+import numpy as np
+from typing import Any, List
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+BATCH_ENTRIES = 1 << 22
+
+_RAND_BLOCK_ENTRIES = 1 << 22
+
+
+def fits_int64(lo: int, hi: int) -> bool:
+    return INT64_MIN <= lo and hi <= INT64_MAX
+
+
+def exact(values: Any) -> np.ndarray:
+    try:
+        a = np.asarray(values, dtype=np.int64)
+    except OverflowError:
+        a = np.asarray(values, dtype=object)
+    if a.dtype == object and a.size and fits_int64(int(min(a)), int(max(a))):
+        a = a.astype(np.int64)
+    return a
+
+
+def seeded_rng(seed: Any = None) -> np.random.Generator:
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if seed is None:
+        seed = rand.getrandbits(64)
+    return np.random.default_rng(seed)
+
+
+def check_rand_range(length: int, lo: int, hi: int) -> None:
+    if length < 1:
+        raise ValueError("length must be greater than 0.")
+    if hi - lo + 1 < length:
+        raise ValueError("Length higher than range of possible values.")
+
+
+def _floyd(rng: np.random.Generator, length: int, span: int) -> List[int]:
+    r = rand.Random(int(rng.integers(1 << 63)))
+    chosen = set()
+    for j in range(span - length, span):
+        t = r.randrange(j + 1)
+        chosen.add(j if t in chosen else t)
+    return sorted(chosen)
+
+
+def _rand_dense(rng: np.random.Generator, num: int, length: int, span: int) -> np.ndarray:
+    rows = rng.permuted(np.broadcast_to(np.arange(span, dtype=np.int64), (num, span)), axis=1)
+    rows = rows[:, :length]
+    rows.sort(axis=1)
+    return rows
+
+
+def _rand_sparse(rng: np.random.Generator, num: int, length: int, span: int) -> np.ndarray:
+    draws = min(span, int(-span * np.log1p(-length / span) * 1.05) + 16)
+    out = np.empty((num, length), dtype=np.int64)
+    todo = np.arange(num)
+    while todo.size:
+        rows = rng.integers(0, span, size=(todo.size, draws))
+        rows.sort(axis=1)
+        dup = np.zeros(rows.shape, dtype=bool)
+        np.equal(rows[:, 1:], rows[:, :-1], out=dup[:, 1:])
+        ok = draws - dup.sum(axis=1) >= length
+        keys = rng.random(rows.shape)
+        keys[dup] = 2.0
+        pick = np.argpartition(keys[ok], length - 1, axis=1)[:, :length]
+        picked = np.take_along_axis(rows[ok], pick, axis=1)
+        picked.sort(axis=1)
+        out[todo[ok]] = picked
+        todo = todo[~ok]
+    return out
+
+
+def rand_rows(rng: np.random.Generator, num: int, length: int, lo: int, hi: int) -> np.ndarray:
+    check_rand_range(length, lo, hi)
+    lo, hi = int(lo), int(hi)
+    span = hi - lo + 1
+    if not fits_int64(lo, hi) or span > INT64_MAX:
+        rows = np.empty((num, length), dtype=object)
+        for i in range(num):
+            rows[i] = [lo + x for x in _floyd(rng, length, span)]
+        return rows
+
+    dense = 2 * length > span
+    width = span if dense else length
+    step = max(1, _RAND_BLOCK_ENTRIES // width)
+    blocks = []
+    for start in range(0, num, step):
+        count = min(step, num - start)
+        block = _rand_dense(rng, count, length, span) if dense else _rand_sparse(rng, count, length, span)
+        blocks.append(block + lo)
+    if not blocks:
+        return np.empty((0, length), dtype=np.int64)
+    return np.concatenate(blocks)
+
+
+def distinct_and_energy(vals: np.ndarray, valid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    m, width = vals.shape
+    first = vals[:, :1]
+    padding = width - np.count_nonzero(valid, axis=1)
+    vals = np.sort(np.where(valid, vals, first), axis=1)
+    starts = np.ones((m, width), dtype=bool)
+    starts[:, 1:] = vals[:, 1:] != vals[:, :-1]
+
+    flat = np.flatnonzero(starts)
+    rows = flat // width
+    ends = np.empty_like(flat)
+    ends[:-1] = flat[1:]
+    if flat.size:
+        ends[-1] = m * width
+    lengths = ends - flat
+    padded = vals.ravel()[flat] == first[rows, 0]
+    lengths[padded] -= padding[rows[padded]]
+
+    distinct = np.bincount(rows, minlength=m)
+    energy = np.zeros(m, dtype=np.int64)
+    np.add.at(energy, rows, lengths * lengths)
+    return distinct, energy
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+from collections import Counter
+from ookami._common import BATCH_ENTRIES, distinct_and_energy, exact, fits_int64
+from ookami.combset import CombSet
+from typing import Dict, List, Sequence, Tuple, Union
+
+BATCH_FIELDS = (
+    "cardinality", "diameter", "add_ds_card", "diff_ds_card",
+    "mult_ds_card", "add_energy", "mult_energy"
+)
+
+_BATCH_OPS = (("add", np.add), ("diff", np.subtract), ("mult", np.multiply))
+
+
+def _as_array(s: Union[CombSet, Sequence[int], np.ndarray]) -> np.ndarray:
+    if isinstance(s, CombSet):
+        return s._set
+    a = np.unique(exact(s))
+    if a.size == 0:
+        raise ValueError("sets cannot be empty!")
+    return a
+
+
+def _pack(arrays: List[np.ndarray]) -> np.ndarray:
+    width = max(a.size for a in arrays)
+    packed = np.zeros((len(arrays), width), dtype=np.int64)
+    for i, a in enumerate(arrays):
+        packed[i, :a.size] = a
+    return packed
+
+
+def _exact_distinct_and_energy(arrays: List[np.ndarray], ufunc: np.ufunc) -> Tuple[np.ndarray, np.ndarray]:
+    distinct = np.zeros(len(arrays), dtype=np.int64)
+    energy = np.zeros(len(arrays), dtype=np.int64)
+    for i, a in enumerate(arrays):
+        a = a.astype(object)
+        counts = Counter(ufunc.outer(a, a).ravel().tolist())
+        distinct[i] = len(counts)
+        energy[i] = sum(c * c for c in counts.values())
+    return distinct, energy
+
+
+def _batch_kernel(arrays: List[np.ndarray], sizes: np.ndarray) -> Dict[str, np.ndarray]:
+    lo = min(int(a[0]) for a in arrays)
+    hi = max(int(a[-1]) for a in arrays)
+    corners = (lo * lo, lo * hi, hi * hi)
+    bounds = {"add": (2 * lo, 2 * hi), "diff": (lo - hi, hi - lo), "mult": (min(corners), max(corners))}
+    packed = _pack(arrays) if fits_int64(lo, hi) else None
+    if packed is not None:
+        m, width = packed.shape
+        present = np.arange(width) < sizes[:, None]
+        valid = (present[:, :, None] & present[:, None, :]).reshape(m, -1)
+        a = packed[:, :, None]
+        b = packed[:, None, :]
+
+    stats = {}
+    for op, ufunc in _BATCH_OPS:
+        if packed is not None and fits_int64(*bounds[op]):
+            stats[op] = distinct_and_energy(ufunc(a, b).reshape(m, -1), valid)
+        else:
+            stats[op] = _exact_distinct_and_energy(arrays, ufunc)
+
+    if packed is not None and fits_int64(0, hi - lo):
+        diameter = packed[np.arange(m), sizes - 1] - packed[:, 0]
+    else:
+        diameter = exact([int(a[-1]) - int(a[0]) for a in arrays])
+    return {
+        "cardinality": sizes,
+        "diameter": diameter,
+        "add_ds_card": stats["add"][0],
+        "diff_ds_card": stats["diff"][0],
+        "mult_ds_card": stats["mult"][0],
+        "add_energy": stats["add"][1],
+        "mult_energy": stats["mult"][1],
+    }
+
+
+def batch_info(sets: Sequence[Union[CombSet, Sequence[int], np.ndarray]]) -> Dict[str, np.ndarray]:
+    arrays = [_as_array(s) for s in sets]
+    if not arrays:
+        raise ValueError("sets cannot be empty!")
+    sizes = np.array([a.size for a in arrays], dtype=np.int64)
+    order = np.argsort(sizes, kind="stable")
+    out = {field: np.zeros(len(arrays), dtype=np.int64) for field in BATCH_FIELDS}
+
+    lo = 0
+    while lo < len(order):
+        hi = lo + 1
+        while hi < len(order) and (hi - lo + 1) * int(sizes[order[hi]]) ** 2 <= BATCH_ENTRIES:
+            hi += 1
+        idx = order[lo:hi]
+        result = _batch_kernel([arrays[i] for i in idx], sizes[idx])
+        for field in BATCH_FIELDS:
+            if result[field].dtype == object and out[field].dtype != object:
+                out[field] = out[field].astype(object)
+            out[field][idx] = result[field]
+        lo = hi
+
+    return out
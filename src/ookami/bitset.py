@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from collections import Counter
+from fractions import Fraction
+from ookami.combset import CombSet
+from typing import Iterable, Iterator, List
+
+
+def mask_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def sumset_mask(mask: int) -> int:
+    sums = 0
+    for i in mask_bits(mask):
+        sums |= mask << i
+    return sums
+
+
+def diffset_mask(mask: int) -> int:
+    top = mask.bit_length() - 1
+    diffs = 0
+    shifted = mask << top
+    for i in mask_bits(mask):
+        diffs |= shifted >> i
+    return diffs
+
+
+def energy_add_mask(mask: int) -> int:
+    card = mask.bit_count()
+    energy = card * card
+    for d in range(1, mask.bit_length()):
+        r = (mask & (mask >> d)).bit_count()
+        energy += 2 * r * r
+    return energy
+
+
+def is_ap_mask(mask: int) -> bool:
+    card = mask.bit_count()
+    if card <= 2:
+        return True
+    low = (mask & -mask).bit_length() - 1
+    norm = mask >> low
+    d = ((norm ^ 1) & -(norm ^ 1)).bit_length() - 1
+    return norm == ((1 << (d * card)) - 1) // ((1 << d) - 1)
+
+
+def products(elements: List[int]) -> Counter:
+    counts: Counter = Counter()
+    for i, a in enumerate(elements):
+        counts[a * a] += 1
+        for b in elements[i + 1:]:
+            counts[a * b] += 2
+    return counts
+
+
+def is_gp_elements(elements: List[int]) -> bool:
+    if len(elements) <= 2:
+        return True
+    a0, a1 = elements[0], elements[1]
+    return all(elements[i] * a0 == elements[i - 1] * a1 for i in range(2, len(elements)))
+
+
+class BitSet():
+    def __init__(self, mask: int, offset: int = 0) -> None:
+        if mask <= 0:
+            raise ValueError("mask must be a positive integer!")
+        self.mask = mask
+        self.offset = offset
+
+    @classmethod
+    def from_iterable(cls, elements: Iterable[int]) -> BitSet:
+        elements = [int(x) for x in elements]
+        if not elements:
+            raise ValueError("elements cannot be empty!")
+        offset = min(elements)
+        mask = 0
+        for x in elements:
+            mask |= 1 << (x - offset)
+        return cls(mask, offset)
+
+    @property
+    def elements(self) -> List[int]:
+        return [i + self.offset for i in mask_bits(self.mask)]
+
+    def to_combset(self) -> CombSet:
+        return CombSet(self.elements)
+
+    @property
+    def cardinality(self) -> int:
+        return self.mask.bit_count()
+
+    @property
+    def diameter(self) -> int:
+        return self.mask.bit_length() - (self.mask & -self.mask).bit_length()
+
+    @property
+    def density(self) -> Fraction:
+        return Fraction(self.cardinality, self.diameter + 1)
+
+    @property
+    def ads(self) -> BitSet:
+        return BitSet(sumset_mask(self.mask), 2 * self.offset)
+
+    @property
+    def dds(self) -> BitSet:
+        return BitSet(diffset_mask(self.mask), -(self.mask.bit_length() - 1))
+
+    @property
+    def ads_cardinality(self) -> int:
+        return sumset_mask(self.mask).bit_count()
+
+    @property
+    def dds_cardinality(self) -> int:
+        return diffset_mask(self.mask).bit_count()
+
+    @property
+    def mds_cardinality(self) -> int:
+        return len(products(self.elements))
+
+    @property
+    def doubling_constant(self) -> Fraction:
+        return Fraction(self.ads_cardinality, self.cardinality)
+
+    @property
+    def is_arithmetic_progression(self) -> bool:
+        return is_ap_mask(self.mask)
+
+    @property
+    def is_geometric_progression(self) -> bool:
+        if self.offset <= 0 and self.mask >> -self.offset & 1:
+            return self.cardinality == 1
+        return is_gp_elements(self.elements)
+
+    @property
+    def energy_add(self) -> int:
+        return energy_add_mask(self.mask)
+
+    @property
+    def energy_mult(self) -> int:
+        return sum(c * c for c in products(self.elements).values())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BitSet):
+            low = (self.mask & -self.mask).bit_length() - 1
+            other_low = (other.mask & -other.mask).bit_length() - 1
+            return self.mask >> low == other.mask >> other_low and self.offset + low == other.offset + other_low
+        return False
+
+    def __str__(self) -> str:
+        return "BitSet(" + str(self.elements) + ")"
+
+    __repr__ = __str__
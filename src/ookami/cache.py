@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+_ENTRY_OVERHEAD = 128
+_OBJECT_ITEM_BYTES = 36
+
+
+def array_key(a: np.ndarray, translate: bool = False) -> Tuple[Any, ...]:
+    if translate and a.size:
+        a = a - a[0]
+    if a.dtype == object:
+        data = ",".join(str(int(x)) for x in a).encode()
+    else:
+        data = np.ascontiguousarray(a, dtype=np.int64).tobytes()
+    return (int(a.size), translate, hashlib.blake2b(data, digest_size=16).digest())
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + _OBJECT_ITEM_BYTES * value.size
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return 0
+
+
+class SharedCache():
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = int(max_bytes)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = _nbytes(value) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+shared_cache = SharedCache()
+
+
+def set_cache_limit(max_bytes: int) -> None:
+    if max_bytes < 0:
+        raise ValueError("max_bytes must be non-negative!")
+    shared_cache.resize(max_bytes)
+
+
+def cache_stats() -> Dict[str, int]:
+    return shared_cache.stats()
+
+
+def clear_shared_cache() -> None:
+    shared_cache.clear()
@@ -1,12 +1,598 @@
 from __future__ import annotations
 
+import heapq
+import math
 import random as rand
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from fractions import Fraction
 import numpy as np
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from ookami._common import INT64_MAX, exact, fits_int64, rand_rows, seeded_rng
+from ookami.cache import array_key, shared_cache
+from ookami.store import active_store
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+SUMSET_METHODS = ("auto", "outer", "fft", "sparse")
+
+_OPTIONS: Dict[str, Any] = {
+    "block_size": 1 << 24,
+    "memory_limit": None,
+    "workers": 1,
+}
+
+_ENTRY_BYTES = 48
+_PARALLEL_MIN_PAIRS = 1 << 18
+_INCREMENTAL_MIN_SIZE = 32
+_SHARED_MIN_SIZE = 64
+_SMALL_SIZE = 48
+_APERY_MAX = 1 << 20
+
+_FFT_MIN_PAIRS = 1024
+_DIRECT_CONVOLVE = 64
+_FFT_EXACT_BOUND = 2.0**42
+
+def set_options(**options: Any) -> None:
+    unknown = [name for name in options if name not in _OPTIONS]
+    if unknown:
+        raise ValueError(f"Unknown options {unknown}; expected a subset of {tuple(_OPTIONS)}.")
+    if "block_size" in options and int(options["block_size"]) < 1:
+        raise ValueError("block_size must be at least 1.")
+    if options.get("memory_limit") is not None and int(options["memory_limit"]) < 1:
+        raise ValueError("memory_limit must be a positive number of bytes or None.")
+    if "workers" in options and int(options["workers"]) < 1:
+        raise ValueError("workers must be at least 1.")
+    _OPTIONS.update(options)
+
+
+def _block_entries() -> int:
+    entries = int(_OPTIONS["block_size"])
+    if _OPTIONS["memory_limit"] is not None:
+        entries = min(entries, int(_OPTIONS["memory_limit"]) // _ENTRY_BYTES // int(_OPTIONS["workers"]))
+    return max(1, entries)
+
+
+def _tiled(pairs: int) -> bool:
+    return pairs > _block_entries() or (int(_OPTIONS["workers"]) > 1 and pairs >= _PARALLEL_MIN_PAIRS)
+
+
+def _tile_starts(rows: int, cols: int) -> range:
+    step = max(1, _block_entries() // cols)
+    workers = int(_OPTIONS["workers"])
+    if workers > 1:
+        step = min(step, -(-rows // workers))
+    return range(0, rows, step)
+
+
+def _map_tiles(fn: Any, starts: range) -> Iterator[Any]:
+    workers = int(_OPTIONS["workers"])
+    if workers == 1 or len(starts) == 1:
+        yield from map(fn, starts)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for lo in starts:
+            if len(pending) == workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(fn, lo))
+        while pending:
+            yield pending.popleft().result()
+
+
+def _fits_memory(entries: int) -> bool:
+    limit = _OPTIONS["memory_limit"]
+    return limit is None or entries * _ENTRY_BYTES <= int(limit)
+
+
+def get_options() -> Dict[str, Any]:
+    return dict(_OPTIONS)
+
+
+def _outer(ufunc: np.ufunc, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    corners = ufunc.outer(a[[0, -1]].astype(object), b[[0, -1]].astype(object))
+    if a.dtype != object and b.dtype != object and fits_int64(corners.min(), corners.max()):
+        return ufunc.outer(a, b)
+    return ufunc.outer(a.astype(object), b.astype(object))
+
+
+def _shift(a: np.ndarray, n: int) -> np.ndarray:
+    lo, hi = int(a[0]) + n, int(a[-1]) + n
+    if a.dtype != object and fits_int64(min(lo, hi, n), max(lo, hi, n)):
+        return a + n
+    return a.astype(object) + n
+
+
+def _scale(a: np.ndarray, n: int) -> np.ndarray:
+    lo, hi = int(a[0]) * n, int(a[-1]) * n
+    if a.dtype != object and fits_int64(min(lo, hi, n), max(lo, hi, n)):
+        return a * n
+    return a.astype(object) * n
+
+
+def _convolve(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    if min(u.size, v.size) <= _DIRECT_CONVOLVE:
+        return np.convolve(u, v)
+    size = u.size + v.size - 1
+    if float(u.max()) * float(v.max()) * size >= _FFT_EXACT_BOUND:
+        if u.max() < v.max():
+            u, v = v, u
+        shift = max(1, int(u.max()).bit_length() // 2)
+        hi = _convolve(u >> shift, v)
+        lo = _convolve(u & ((1 << shift) - 1), v)
+        return (hi << shift) + lo
+    nfft = 1 << (size - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(u, nfft) * np.fft.rfft(v, nfft), nfft)[:size]
+    return np.rint(out).astype(np.int64)
+
+
+def _convolve_exact(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    width = max(1, 62 - int(v.max()).bit_length() - min(u.size, v.size).bit_length())
+    mask = (1 << width) - 1
+    u = u.astype(object)
+    out = np.zeros(u.size + v.size - 1, dtype=object)
+    shift = 0
+    while np.any(u):
+        out += _convolve((u & mask).astype(np.int64), v).astype(object) << shift
+        u = u >> width
+        shift += width
+    return out
+
+
+def _indicator(a: np.ndarray) -> np.ndarray:
+    ind = np.zeros(int(a[-1]) - int(a[0]) + 1, dtype=np.int64)
+    ind[(a - a[0]).astype(np.int64)] = 1
+    return ind
+
+
+def _unique(a: np.ndarray, inplace: bool = False) -> np.ndarray:
+    if a.size == 0:
+        return a
+    if inplace:
+        a.sort()
+    else:
+        a = np.sort(a)
+    keep = np.empty(a.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(a[1:], a[:-1], out=keep[1:])
+    return a[keep]
+
+
+def _merge_runs(runs: List[np.ndarray]) -> np.ndarray:
+    if len(runs) == 1:
+        return runs[0]
+    return _unique(np.concatenate(runs), inplace=True)
+
+
+def _push_run(runs: List[Any], run: Any, merge: Any, size: Any) -> None:
+    runs.append(run)
+    while len(runs) > 1 and size(runs[-2]) <= 2 * size(runs[-1]):
+        top = runs.pop()
+        runs[-1] = merge([runs[-1], top])
+
+
+def _sparse_outer(ufunc: np.ufunc, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    starts = _tile_starts(a.size, b.size)
+
+    def tile(lo: int) -> np.ndarray:
+        return _unique(_outer(ufunc, a[lo:lo + starts.step], b).ravel(), inplace=True)
+
+    runs: List[np.ndarray] = []
+    for run in _map_tiles(tile, starts):
+        _push_run(runs, run, _merge_runs, len)
+    return _merge_runs(runs)
+
+
+def _small(a: np.ndarray, b: np.ndarray) -> bool:
+    if a.size >= _SMALL_SIZE or b.size >= _SMALL_SIZE or a.dtype == object or b.dtype == object:
+        return False
+    bound = max(-int(a[0]), int(a[-1]))
+    if b is not a:
+        bound = max(bound, -int(b[0]), int(b[-1]))
+    return bound * bound <= INT64_MAX
+
+
+def _choose_method(a: np.ndarray, b: np.ndarray) -> str:
+    pairs = a.size * b.size
+    span = int(a[-1]) - int(a[0]) + int(b[-1]) - int(b[0]) + 2
+    if pairs >= _FFT_MIN_PAIRS and pairs >= span and _fits_memory(2 * span):
+        return "fft"
+    if _tiled(pairs):
+        return "sparse"
+    return "outer"
+
+
+def _sumset(a: np.ndarray, b: np.ndarray, method: str = "auto") -> np.ndarray:
+    if method not in SUMSET_METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {SUMSET_METHODS}.")
+    if method == "auto":
+        if _small(a, b):
+            return _unique(np.add.outer(a, b).ravel(), inplace=True)
+        method = _choose_method(a, b)
+    if method == "fft":
+        conv = _convolve(_indicator(a), _indicator(b))
+        return _shift(np.flatnonzero(conv), int(a[0]) + int(b[0]))
+    if method == "sparse":
+        return _sparse_outer(np.add, a, b)
+    return _unique(_outer(np.add, a, b).ravel(), inplace=True)
+
+
+def _products(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if _small(a, b):
+        return _unique(np.multiply.outer(a, b).ravel(), inplace=True)
+    if _tiled(a.size * b.size):
+        return _sparse_outer(np.multiply, a, b)
+    return _unique(_outer(np.multiply, a, b).ravel(), inplace=True)
+
+
+def _diffset(a: np.ndarray, b: np.ndarray, method: str = "auto") -> np.ndarray:
+    if method == "auto" and _small(a, b):
+        return _unique(np.subtract.outer(a, b).ravel(), inplace=True)
+    if method == "outer":
+        return _unique(_outer(np.subtract, a, b).ravel(), inplace=True)
+    return _sumset(a, _scale(b[::-1], -1), method)
+
+
+REP_OPS = ("add", "diff", "mult")
+
+_REP_UFUNCS = {"add": np.add, "diff": np.subtract, "mult": np.multiply}
+
+INFO_FIELDS = (
+    "add_ds", "diff_ds", "mult_ds", "cardinality", "diameter", "density",
+    "dc", "is_ap", "is_gp", "add_energy", "mult_energy"
+)
+
+_INFO_GETTERS = {
+    "add_ds": "ads",
+    "diff_ds": "dds",
+    "mult_ds": "mds",
+    "cardinality": "cardinality",
+    "diameter": "diameter",
+    "density": "density",
+    "dc": "doubling_constant",
+    "is_ap": "is_arithmetic_progression",
+    "is_gp": "is_geometric_progression",
+    "add_energy": "energy_add",
+    "mult_energy": "energy_mult",
+}
+
+
+def _square_sum(c: np.ndarray) -> int:
+    if c.size == 0:
+        return 0
+    if float(np.abs(c).max()) ** 2 * c.size < 2.0**63:
+        return int(np.dot(c, c))
+    c = c.astype(object)
+    return int(np.dot(c, c))
+
+
+def _common(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if a.dtype == object or b.dtype == object:
+        return a.astype(object), b.astype(object)
+    return a, b
+
+
+def _members(a: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    a, values = _common(a, values)
+    pos = np.searchsorted(a, values)
+    hit = np.zeros(values.size, dtype=bool)
+    inside = pos < a.size
+    hit[inside] = a[pos[inside]] == values[inside]
+    return pos, hit
+
+
+def _insert_sorted(a: np.ndarray, pos: np.ndarray, items: np.ndarray) -> np.ndarray:
+    out = np.empty(a.size + items.size, dtype=a.dtype)
+    at = pos + np.arange(items.size)
+    rest = np.ones(out.size, dtype=bool)
+    rest[at] = False
+    out[at] = items
+    out[rest] = a
+    return out
+
+
+class _Histogram():
+    def __init__(self, counts: np.ndarray, offset: int = 0, values: Optional[np.ndarray] = None, owned: bool = False) -> None:
+        self.counts = counts
+        self.offset = offset
+        self.values = values
+        self.owned = owned
+
+    def count(self, x: int) -> int:
+        if self.values is None:
+            i = int(x) - self.offset
+            if 0 <= i < self.counts.size:
+                return int(self.counts[i])
+            return 0
+        i = int(np.searchsorted(self.values, x))
+        if i < self.values.size and self.values[i] == x:
+            return int(self.counts[i])
+        return 0
+
+    def support(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.values is None:
+            idx = np.flatnonzero(self.counts)
+            return _shift(idx, self.offset), self.counts[idx]
+        return self.values, self.counts
+
+    def energy(self) -> int:
+        return _square_sum(self.counts)
+
+    def updated(self, values: np.ndarray, deltas: np.ndarray, dense: bool) -> Tuple[_Histogram, int, np.ndarray, np.ndarray]:
+        if self.values is None and dense and values.dtype != object:
+            counts, offset = self.counts, self.offset
+            end = offset + counts.size
+            lo, hi = min(offset, int(values[0])), max(end, int(values[-1]) + 1)
+            if lo < offset or hi > end:
+                lo -= counts.size if lo < offset else 0
+                hi += counts.size if hi > end else 0
+                grown = np.zeros(hi - lo, dtype=counts.dtype)
+                grown[offset - lo:end - lo] = counts
+                counts, offset = grown, lo
+            elif not self.owned:
+                counts = counts.copy()
+            idx = (values - offset).astype(np.int64)
+            old = counts[idx]
+            new = old + deltas
+            counts[idx] = new
+            hist = _Histogram(counts, offset, owned=True)
+        else:
+            support, counts = self.support()
+            pos, hit = _members(support, values)
+            old = np.zeros(values.size, dtype=counts.dtype)
+            old[hit] = counts[pos[hit]]
+            new = old + deltas
+            counts = counts.copy()
+            counts[pos[hit]] = new[hit]
+            support, values = _common(support, values)
+            support = _insert_sorted(support, pos[~hit], values[~hit])
+            counts = _insert_sorted(counts, pos[~hit], new[~hit])
+            keep = counts != 0
+            hist = _Histogram(counts[keep], values=exact(support[keep]))
+        change = _square_sum(new) - _square_sum(old)
+        return hist, change, values[(old == 0) & (new != 0)], values[(old != 0) & (new == 0)]
+
+    def shifted(self, n: int) -> _Histogram:
+        if self.values is None:
+            return _Histogram(self.counts, self.offset + n)
+        return _Histogram(self.counts, values=_shift(self.values, n))
+
+    def affine(self, shift: int, step: int, mirror: Optional[int], inverse: bool = False) -> _Histogram:
+        if step == 1 and mirror is None:
+            return self.shifted(-shift if inverse else shift)
+        values, counts = self.support()
+        if mirror is not None:
+            counts = counts[::-1]
+        values = (_from_affine if inverse else _to_affine)(values, shift, step, mirror)
+        return _Histogram(counts, values=values)
+
+    @property
+    def nbytes(self) -> int:
+        if self.values is None:
+            return self.counts.nbytes
+        return self.counts.nbytes + self.values.nbytes
+
+
+def _pair_deltas(a: np.ndarray, x: int, op: str, sign: int) -> Tuple[np.ndarray, np.ndarray]:
+    if op == "add":
+        parts = [(_shift(a, x), 2), (exact([2 * x]), 1)]
+    elif op == "diff":
+        parts = [(_shift(a, -x), 1), (_shift(_scale(a, -1), x), 1), (exact([0]), 1)]
+    else:
+        parts = [(_scale(a, x), 2), (exact([x * x]), 1)]
+    values = np.concatenate([p for p, _ in parts])
+    weights = np.concatenate([np.full(p.size, sign * w, dtype=np.int64) for p, w in parts])
+    values, weights = _reduce_counts(values, weights)
+    return exact(values), weights
+
+
+def _pair_count(a: np.ndarray, x: int, op: str) -> int:
+    if op == "add":
+        partners = _shift(_scale(a[::-1], -1), x)
+    elif op == "diff":
+        partners = _shift(a, -x)
+    elif x == 0:
+        return 2 * a.size - 1 if _members(a, exact([0]))[1][0] else 0
+    else:
+        a, target = _common(a, exact([x]))
+        if a.dtype != object and x == -INT64_MAX - 1:
+            a, target = a.astype(object), target.astype(object)
+        divisors = a[a != 0]
+        divisors = divisors[target[0] % divisors == 0]
+        partners = target[0] // divisors
+    return int(np.count_nonzero(_members(a, partners)[1]))
+
+
+def _additive_histogram(a: np.ndarray, k: int, op: str) -> _Histogram:
+    counts = _indicator(a)
+    offset = int(a[0])
+    step = _indicator(a) if op == "add" else _indicator(_scale(a[::-1], -1))
+    step_offset = int(a[0]) if op == "add" else -int(a[-1])
+    for _ in range(k - 1):
+        if counts.dtype == object or int(counts.max()) * a.size > INT64_MAX:
+            counts = _convolve_exact(counts, step)
+        else:
+            counts = _convolve(counts, step)
+        offset += step_offset
+    return _Histogram(counts, offset)
+
+
+def _run_starts(values: np.ndarray) -> np.ndarray:
+    keep = np.empty(values.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return keep.nonzero()[0]
+
+
+def _reduce_counts(values: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    if weights is None:
+        values = np.sort(values)
+        starts = _run_starts(values)
+        counts = np.empty_like(starts)
+        counts[:-1] = starts[1:]
+        counts[-1] = values.size
+        counts -= starts
+        return values[starts], counts
+    if values.dtype != object and weights.dtype != object and weights.min() >= 0:
+        lo = int(values.min())
+        bits = int(weights.max()).bit_length()
+        if (int(values.max()) - lo + 1) << bits <= INT64_MAX:
+            keys = ((values - lo) << bits) | weights
+            keys.sort()
+            values = keys >> bits
+            starts = _run_starts(values)
+            return values[starts] + lo, np.add.reduceat(keys & ((1 << bits) - 1), starts)
+    order = np.argsort(values)
+    values = values[order]
+    starts = _run_starts(values)
+    return values[starts], np.add.reduceat(weights[order], starts)
+
+
+def _merge_counts(runs: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    if len(runs) == 1:
+        return runs[0]
+    return _reduce_counts(np.concatenate([r[0] for r in runs]), np.concatenate([r[1] for r in runs]))
+
+
+def _build_histogram(a: np.ndarray, k: int, op: str) -> _Histogram:
+    if op == "mult":
+        return _merge_histogram(a, k, np.multiply)
+    span = int(a[-1]) - int(a[0]) + 1
+    if a.size ** 2 >= k * span and _fits_memory(k * span):
+        return _additive_histogram(a, k, op)
+    return _merge_histogram(a, k, np.add if op == "add" else np.subtract)
+
+
+def _merge_histogram(a: np.ndarray, k: int, ufunc: np.ufunc) -> _Histogram:
+    values = a
+    counts = np.ones(a.size, dtype=np.int64)
+    for _ in range(k - 1):
+        if counts.dtype != object and int(counts.max()) * a.size > INT64_MAX:
+            counts = counts.astype(object)
+        unit = bool(counts.max() == 1)
+        starts = _tile_starts(values.size, a.size)
+
+        def tile(lo: int) -> Tuple[np.ndarray, np.ndarray]:
+            hi = lo + starts.step
+            return _reduce_counts(_outer(ufunc, values[lo:hi], a).ravel(), None if unit else np.repeat(counts[lo:hi], a.size))
+
+        runs: List[Tuple[np.ndarray, np.ndarray]] = []
+        for run in _map_tiles(tile, starts):
+            _push_run(runs, run, _merge_counts, lambda r: r[0].size)
+        values, counts = _merge_counts(runs)
+    return _Histogram(counts, values=values)
+
+
+def _normal_form(a: np.ndarray) -> Tuple[np.ndarray, int, int, bool]:
+    start = int(a[0])
+    d = _shift(a, -start)
+    step = int(np.gcd.reduce(d)) if d.dtype != object else math.gcd(*d.tolist())
+    if step == 0:
+        return exact(d), start, 1, False
+    form = exact(d // step)
+    mirror = _shift(_scale(form[::-1], -1), int(form[-1]))
+    differ = np.flatnonzero(form != mirror)
+    if differ.size and mirror[differ[0]] < form[differ[0]]:
+        return mirror, start, step, True
+    return form, start, step, False
+
+
+def _to_affine(values: np.ndarray, shift: int, step: int, mirror: Optional[int]) -> np.ndarray:
+    if mirror is not None:
+        values = _shift(_scale(values[::-1], -1), mirror)
+    if step != 1:
+        values = _scale(values, step)
+    return _shift(values, shift)
+
+
+def _from_affine(values: np.ndarray, shift: int, step: int, mirror: Optional[int]) -> np.ndarray:
+    values = _shift(values, -shift)
+    if step != 1:
+        values = values // step
+    if mirror is not None:
+        values = _shift(_scale(values[::-1], -1), mirror)
+    return exact(values)
+
+
+def _apery(gens: List[int]) -> Optional[List[int]]:
+    a = min(x for x in gens if x > 0)
+    edges: Dict[int, int] = {}
+    for x in gens:
+        if x > 0 and (x % a not in edges or x < edges[x % a]):
+            edges[x % a] = x
+    if a * len(edges) > _APERY_MAX:
+        return None
+    w: List[Optional[int]] = [None] * a
+    w[0] = 0
+    heap = [(0, 0)]
+    while heap:
+        d, r = heapq.heappop(heap)
+        if d > w[r]:
+            continue
+        for x in edges.values():
+            s = (r + x) % a
+            if w[s] is None or d + x < w[s]:
+                w[s] = d + x
+                heapq.heappush(heap, (d + x, s))
+    return w
+
+
+class _Semigroup():
+    def __init__(self, gens: List[int]) -> None:
+        if max(gens) == 0:
+            self.apery, self.frobenius, self.genus = [0], -1, 0
+            return
+        w = _apery(gens)
+        if w is None:
+            raise OverflowError
+        a = len(w)
+        self.apery = w
+        self.frobenius = max(w) - a
+        self.genus = sum(x // a for x in w)
+
+    def elements_below_conductor(self) -> np.ndarray:
+        xs = np.arange(self.frobenius + 1, dtype=np.int64)
+        w = np.asarray(self.apery, dtype=np.int64)
+        return xs[xs >= w[xs % w.size]]
+
+
+class _SumsetGrowth():
+    def __init__(self, a: np.ndarray) -> None:
+        self.start = int(a[0])
+        steps = [int(x) - self.start for x in a.tolist()]
+        self.step = math.gcd(*steps) or 1
+        gens = [x // self.step for x in steps]
+        self.slope = gens[-1]
+        self.low = _Semigroup(gens)
+        self.high = _Semigroup([self.slope - x for x in gens])
+        self.constant = 1 - self.low.genus - self.high.genus
+
+    def count(self, k: int) -> int:
+        return self.slope * k + self.constant
+
+    def holds(self, k: int, count: int) -> bool:
+        return k * self.slope > self.low.frobenius + self.high.frobenius + self.slope and count == self.count(k)
+
+    def level(self, k: int) -> np.ndarray:
+        top = k * self.slope
+        normal = np.concatenate((
+            self.low.elements_below_conductor(),
+            np.arange(self.low.frobenius + 1, top - self.high.frobenius, dtype=np.int64),
+            top - self.high.elements_below_conductor()[::-1],
+        ))
+        return _shift(_scale(normal, self.step), k * self.start)
+
+
+def _sumset_growth(a: np.ndarray) -> Optional[_SumsetGrowth]:
+    try:
+        return _SumsetGrowth(a)
+    except OverflowError:
+        return None
+
 
 class CombSet():
+    __slots__ = ("_set", "_caches")
+
     def __init__(self, base_set: Optional[Union[Sequence[int], np.ndarray]] = None) -> None:
+        self._caches = None
         if base_set is not None:
             if isinstance(base_set, list):
                 if base_set == []:
@@ -17,31 +603,115 @@ class CombSet():
 
             self._set = base_set
             self._normalize()
-        
-        self.add_cache = {}
-        self.diff_cache = {}
-        self.mult_cache = {}
-        self.rep_add_cache = {}
-        self.rep_diff_cache = {}
-        self.rep_mult_cache = {}
-        self.energies = {}
-
-        if base_set is None:
+        else:
             self.construct()
 
+    @classmethod
+    def from_sorted(cls, a: np.ndarray) -> CombSet:
+        if a.size == 0:
+            raise ValueError("base_set cannot be empty!")
+        if a.dtype == object and fits_int64(int(a[0]), int(a[-1])):
+            a = a.astype(np.int64)
+        S = cls.__new__(cls)
+        S._set = a
+        S._caches = None
+        return S
+
+    def _cache(self, name: str) -> Dict[Any, Any]:
+        caches = self._caches
+        if caches is None:
+            caches = self._caches = {}
+        cache = caches.get(name)
+        if cache is None:
+            cache = caches[name] = {}
+        return cache
+
+    @property
+    def add_cache(self) -> Dict[int, CombSet]:
+        return self._cache("add")
+
+    @property
+    def diff_cache(self) -> Dict[int, CombSet]:
+        return self._cache("diff")
+
+    @property
+    def mult_cache(self) -> Dict[int, CombSet]:
+        return self._cache("mult")
+
+    @property
+    def rep_add_cache(self) -> Dict[Tuple[int, int], int]:
+        return self._cache("rep_add")
+
+    @property
+    def rep_diff_cache(self) -> Dict[Tuple[int, int], int]:
+        return self._cache("rep_diff")
+
+    @property
+    def rep_mult_cache(self) -> Dict[Tuple[int, int], int]:
+        return self._cache("rep_mult")
+
+    @property
+    def rep_hists(self) -> Dict[Tuple[str, int], _Histogram]:
+        return self._cache("hists")
+
+    @property
+    def energies(self) -> Dict[Tuple[str, int], int]:
+        return self._cache("energies")
+
+    @property
+    def _keys(self) -> Dict[str, Tuple[Any, ...]]:
+        return self._cache("keys")
+
     def add(self, x: int) -> None:
-        self._set = np.append(self._set, int(x))
-        self._normalize()
-        self._clear_cache()
+        x = int(x)
+        a, item = _common(self._set, exact([x]))
+        i = int(np.searchsorted(a, x))
+        if i < a.size and a[i] == x:
+            return
+        base = self._set
+        self._set = exact(np.concatenate((a[:i], item, a[i:])))
+        self._update(x, base, 1)
 
     def remove(self, x: int) -> None:
         x = int(x)
-        if self.cardinality > 0:
-            self._set = self._set[self._set != x]
-        if self._set.size == 0:
+        a, _ = _common(self._set, exact([x]))
+        i = int(np.searchsorted(a, x))
+        if i == a.size or a[i] != x:
+            return
+        if a.size == 1:
             raise ValueError("self._set cannot be empty!")
-        self._normalize()
-        self._clear_cache()
+        self._set = exact(np.delete(a, i))
+        self._update(x, self._set, -1)
+
+    def _update(self, x: int, base: np.ndarray, sign: int) -> None:
+        old = self._caches
+        self._caches = None
+        if old is None or self._set.size < _INCREMENTAL_MIN_SIZE:
+            return
+        hists = old.get("hists", {})
+        energies = old.get("energies", {})
+        diameter = int(self._set[-1]) - int(self._set[0])
+        dense = self._set.size ** 2 >= 2 * (diameter + 1) and _fits_memory(2 * (diameter + 1))
+        for op in REP_OPS:
+            hist = hists.get((op, 2))
+            fold = old.get(op, {}).get(2)
+            if hist is None and (fold is None or sign < 0):
+                continue
+            values, deltas = _pair_deltas(base, x, op, sign)
+            if hist is not None:
+                hist, change, created, vanished = hist.updated(values, deltas, dense)
+                self.rep_hists[(op, 2)] = hist
+                if (op, 2) in energies:
+                    self.energies[(op, 2)] = energies[(op, 2)] + change
+            else:
+                created = values[~_members(fold._set, values)[1]]
+                vanished = values[:0]
+            if fold is not None:
+                a, vanished = _common(fold._set, vanished)
+                a = np.delete(a, np.searchsorted(a, vanished))
+                a, created = _common(a, created)
+                a = _insert_sorted(a, np.searchsorted(a, created), created)
+                self._cache(op)[2] = CombSet.from_sorted(a)
 
     def construct(self, nums: Optional[Union[Sequence[int], np.ndarray]] = None) -> None:
         if nums == []:
@@ -80,78 +750,150 @@ class CombSet():
 
     def translate(self, n: int) -> CombSet:
         n = int(n)
-        return CombSet(self._set + n)
+        return CombSet.from_sorted(_shift(self._set, n))
 
     def rep_add(self, x: int, k: int = 2) -> int:
-        if (k, int(x)) in self.rep_add_cache:
-            return self.rep_add_cache[(k, int(x))]
-
-        x = int(x)
-        vals = np.add.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.add.outer(vals, self._set).reshape(-1, self._set.size)
-        rep = int(np.count_nonzero(vals == x))
-        self.rep_add_cache[(k, int(x))] = rep
-        return self.rep_add_cache[(k, int(x))]
+        cache = self.rep_add_cache
+        key = (k, int(x))
+        if key not in cache:
+            cache[key] = self._count("add", key[1], k)
+        return cache[key]
 
     def rep_diff(self, x: int, k: int = 2) -> int:
-        if (k, int(x)) in self.rep_diff_cache:
-            return self.rep_diff_cache[(k, int(x))]
-
-        x = int(x)
-        vals = np.subtract.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.subtract.outer(vals, self._set).reshape(-1, self._set.size)
-        rep = int(np.count_nonzero(vals == x))
-        self.rep_diff_cache[(k, int(x))] = rep
-        return self.rep_diff_cache[(k, int(x))]
+        cache = self.rep_diff_cache
+        key = (k, int(x))
+        if key not in cache:
+            cache[key] = self._count("diff", key[1], k)
+        return cache[key]
 
     def rep_mult(self, x: int, k: int = 2) -> int:
-        if (k, int(x)) in self.rep_mult_cache:
-            return self.rep_mult_cache[(k, int(x))]
+        cache = self.rep_mult_cache
+        key = (k, int(x))
+        if key not in cache:
+            cache[key] = self._count("mult", key[1], k)
+        return cache[key]
 
-        x = int(x)
-        vals = np.multiply.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.multiply.outer(vals, self._set).reshape(-1, self._set.size)
-        rep = int(np.count_nonzero(vals == x))
-        self.rep_mult_cache[(k, int(x))] = rep
-        return self.rep_mult_cache[(k, int(x))]
-
-    def rand_set(self, length: int = 0, min_element: int = 0, max_element: int = 0) -> None:
-        if length == 0:
-            raise ValueError("length must be greater than 0.")
-        gen_set = []
-        if max_element - min_element + 1 < length:
-            raise(ValueError("Length higher than range of possible values."))
-        while len(gen_set) < length:
-            r = rand.randint(min_element, max_element)
-            if not r in gen_set:
-                gen_set.append(r)
-
-        self._set = gen_set
+    def _count(self, op: str, x: int, k: int) -> int:
+        k = int(k)
+        if k == 2 and _small(self._set, self._set):
+            return int(np.count_nonzero(_REP_UFUNCS[op].outer(self._set, self._set) == x)) if fits_int64(x, x) else 0
+        hist = self.rep_hists.get((op, k))
+        if hist is not None:
+            return hist.count(x)
+        queried = self._cache("queried")
+        if 1 <= k <= 2 and (op, k) not in queried:
+            queried[(op, k)] = True
+            if k == 1:
+                return int(_members(self._set, exact([x]))[1][0])
+            return _pair_count(self._set, x, op)
+        return self._histogram(op, k).count(x)
+
+    def representation_counts(self, op: str = "add", k: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+        return self._histogram(op, k).support()
+
+    def _histogram(self, op: str, k: int, keep: bool = True) -> _Histogram:
+        k = int(k)
+        if (op, k) in self.rep_hists:
+            return self.rep_hists[(op, k)]
+        if op not in REP_OPS:
+            raise ValueError(f"Unknown operation {op!r}; expected one of {REP_OPS}.")
+        if k < 1:
+            raise ValueError("k must be at least 1.")
+        if k == 2 and _small(self._set, self._set):
+            values, counts = _reduce_counts(_REP_UFUNCS[op].outer(self._set, self._set).ravel())
+            hist = _Histogram(counts, values=values)
+        elif self._set.size < _SHARED_MIN_SIZE:
+            hist = _build_histogram(self._set, k, op)
+        else:
+            key = ("hist", op, k) + self._shared_key(op)
+            hist = shared_cache.get(key)
+            if hist is None:
+                hist = _build_histogram(self._set if op == "mult" else self._normal()[1], k, op)
+                shared_cache.put(key, hist)
+            hist = hist.affine(*self._affine(op, k))
+        if keep:
+            self.rep_hists[(op, k)] = hist
+        return hist
+
+    def _normal(self) -> Tuple[Tuple[Any, ...], np.ndarray, int, int, bool]:
+        if "normal" not in self._keys:
+            form, start, step, reflected = _normal_form(self._set)
+            self._keys["normal"] = (array_key(form, True), form, start, step, reflected)
+        return self._keys["normal"]
+
+    def _shared_key(self, op: str) -> Tuple[Any, ...]:
+        if op != "mult":
+            return self._normal()[0]
+        if "exact" not in self._keys:
+            self._keys["exact"] = array_key(self._set)
+        return self._keys["exact"]
+
+    def _affine(self, op: str, k: int) -> Tuple[int, int, Optional[int]]:
+        if op == "mult":
+            return 0, 1, None
+        _, form, start, step, reflected = self._normal()
+        s = k if op == "add" else 2 - k
+        return s * start, step, s * int(form[-1]) if reflected else None
+
+    def _shared_set(self, op: str, k: int, compute: Any) -> CombSet:
+        if self._set.size < _SHARED_MIN_SIZE:
+            return compute()
+        key = ("set", op, k) + self._shared_key(op)
+        affine = self._affine(op, k)
+        hit = shared_cache.get(key)
+        if hit is not None:
+            return CombSet.from_sorted(_to_affine(hit, *affine))
+        result = compute()
+        shared_cache.put(key, _from_affine(result._set, *affine))
+        return result
+
+    def _energy(self, op: str, k: int) -> int:
+        k = int(k)
+        if (op, k) in self.energies:
+            return self.energies[(op, k)]
+        compute = lambda: self._stored(f"energy_{op}_{k}", op, lambda: self._histogram(op, k, keep=k == 2).energy())
+        if self._set.size < _SHARED_MIN_SIZE:
+            energy = compute()
+        else:
+            key = ("energy", op, k) + self._shared_key(op)
+            energy = shared_cache.get(key)
+            if energy is None:
+                energy = compute()
+                shared_cache.put(key, energy)
+        self.energies[(op, k)] = energy
+        return energy
+
+    def _stored(self, name: str, op: str, compute: Any) -> int:
+        store = active_store()
+        if store is None:
+            return compute()
+        key = self._shared_key(op)
+        value = store.get(key, name)
+        if value is None:
+            value = compute()
+            store.put(key, name, value)
+        return value
+
+    def rand_set(self, length: int = 0, min_element: int = 0, max_element: int = 0, seed: Any = None) -> None:
+        self._set = rand_rows(seeded_rng(seed), 1, length, min_element, max_element)[0]
         self._normalize()
-        self._clear_cache()        
-
-    def info(self, n: int = -1) -> Dict[str, Any]:
-        self_sum = self.ads
-        self_diff = self.dds
-        self_prod = self.mds
-        card = self.cardinality
-        diam = self.diameter
-        densty = self.density
-        dc = self.doubling_constant
-        is_ap = self.is_arithmetic_progression
-        is_gp = self.is_geometric_progression
-        add_energy = self.energy_add
-        mult_energy = self.energy_mult
-        if n > 1:
-            sum_list = []
-            for i in range(2, n+1):
-                sum_list.append(i*self)
-            return {"add_ds": self_sum, "diff_ds": self_diff, "mult_ds": self_prod, "cardinality": card, "diameter": diam, "density": densty, "dc": dc, "is_ap": is_ap, "is_gp": is_gp, "add_energy": add_energy, "mult_energy": mult_energy, "i*A_list": sum_list}
+        self._clear_cache()
 
-        return {"add_ds": self_sum, "diff_ds": self_diff, "mult_ds": self_prod, "cardinality": card, "diameter": diam, "density": densty, "dc": dc, "is_ap": is_ap, "is_gp": is_gp, "add_energy": add_energy, "mult_energy": mult_energy}
+    def info(self, n: int = -1, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        if fields is None:
+            fields = INFO_FIELDS
+        unknown = [f for f in fields if f not in INFO_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {unknown}; expected a subset of {INFO_FIELDS}.")
+
+        for name in ("add_energy", "mult_energy"):
+            if name in fields:
+                getattr(self, _INFO_GETTERS[name])
+
+        result = {name: getattr(self, _INFO_GETTERS[name]) for name in INFO_FIELDS if name in fields}
+        if n > 1:
+            result["i*A_list"] = self.sumset_chain(n)
+        return result
 
     @property
     def cardinality(self):
@@ -159,45 +901,60 @@ class CombSet():
         
     @property
     def diameter(self):
-        return int(self._set[-1] - self._set[0])
+        return int(self._set[-1]) - int(self._set[0])
 
     @property
     def density(self):
-        return Fraction(self.cardinality, int(self._set[-1] - self._set[0] + 1))
+        return Fraction(self.cardinality, self.diameter + 1)
 
     @property
     def ads(self):
         if not 2 in self.add_cache:
-            self.add_cache[2] = 2*self
+            if ("add", 2) in self.rep_hists:
+                self.add_cache[2] = CombSet.from_sorted(self.rep_hists[("add", 2)].support()[0].copy())
+            else:
+                self.add_cache[2] = 2*self
         return self.add_cache[2]
     
     @property
     def dds(self):
         if not 2 in self.diff_cache:
-            self.diff_cache[2] = self - self
+            if ("diff", 2) in self.rep_hists:
+                self.diff_cache[2] = CombSet.from_sorted(self.rep_hists[("diff", 2)].support()[0].copy())
+            else:
+                self.diff_cache[2] = self - self
         return self.diff_cache[2]
 
     @property
     def mds(self):
         if not 2 in self.mult_cache:
-            self.mult_cache[2] = self**2
+            if ("mult", 2) in self.rep_hists:
+                self.mult_cache[2] = CombSet.from_sorted(self.rep_hists[("mult", 2)].support()[0].copy())
+            else:
+                self.mult_cache[2] = self**2
         return self.mult_cache[2]
 
     @property
     def ads_cardinality(self):
-        return int((self.ads)._set.size)
+        if 2 in self.add_cache:
+            return int(self.add_cache[2]._set.size)
+        return self._stored("ads_cardinality", "add", lambda: int((self.ads)._set.size))
 
     @property
     def dds_cardinality(self):
-        return int((self.dds)._set.size)
+        if 2 in self.diff_cache:
+            return int(self.diff_cache[2]._set.size)
+        return self._stored("dds_cardinality", "diff", lambda: int((self.dds)._set.size))
 
     @property
     def mds_cardinality(self):
-        return int((self.mds)._set.size)
+        if 2 in self.mult_cache:
+            return int(self.mult_cache[2]._set.size)
+        return self._stored("mds_cardinality", "mult", lambda: int((self.mds)._set.size))
 
     @property
     def doubling_constant(self):
-        num = int((self.ads)._set.size)
+        num = self.ads_cardinality
         denom = int(self._set.size)
         return Fraction(num, denom)
 
@@ -214,45 +971,38 @@ class CombSet():
             return True
         if np.any(self._set == 0):
             return False
-        a0 = int(self._set[0])
-        a1 = int(self._set[1])
-        r = Fraction(a1, a0)
-        for i in range(2, int(self._set.size)):
-            if Fraction(int(self._set[i]), int(self._set[i-1])) != r:
-                return False
-        return True
+        a = self._set
+        bound = max(abs(int(a[0])), abs(int(a[-1])))
+        if a.dtype == object or not fits_int64(0, bound * bound):
+            a = a.astype(object)
+        return bool(np.all(a[2:] * a[0] == a[1:-1] * a[1]))
+
+    @property
+    def normal_form(self):
+        return CombSet.from_sorted(self._normal()[1].copy())
+
+    @property
+    def normal_hash(self):
+        return self._normal()[0][2].hex()
+
+    @property
+    def ap_hull(self):
+        _, form, start, step, _ = self._normal()
+        return start, step, int(form[-1]) + 1
 
     @property
     def energy_add(self):
         return self.k_energy_add(2)
 
     def k_energy_add(self, k: int) -> int:
-        if ("add", int(k)) in self.energies:
-            return self.energies[("add", int(k))]
-
-        vals = np.add.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.add.outer(vals, self._set).reshape(-1, self._set.size)
-        _, counts = np.unique(vals.ravel(), return_counts=True)
-        energy = int(np.sum(counts.astype(int) ** 2))
-        self.energies[("add", int(k))] = energy
-        return self.energies[("add", int(k))]
+        return self._energy("add", k)
 
     @property
     def energy_diff(self):
         return self.k_energy_diff(2)
 
     def k_energy_diff(self, k: int) -> int:
-        if ("diff", int(k)) in self.energies:
-            return self.energies[("diff", int(k))]
-
-        vals = np.subtract.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.subtract.outer(vals, self._set).reshape(-1, self._set.size)
-        _, counts = np.unique(vals.ravel(), return_counts=True)
-        energy = int(np.sum(counts.astype(int) ** 2))
-        self.energies[("diff", int(k))] = energy
-        return self.energies[("diff", int(k))]
+        return self._energy("diff", k)
 
     @property
     def energy_mult(self):
@@ -269,65 +1019,134 @@ class CombSet():
         return float(np.log(num / denom) if denom > 0 else float('inf'))
 
     def k_energy_mult(self, k: int) -> int:
-        if ("mult", int(k)) in self.energies:
-            return self.energies[("mult", int(k))]
-
-        vals = np.multiply.outer(self._set, self._set)
-        for _ in range(int(k) - 2):
-            vals = np.multiply.outer(vals, self._set).reshape(-1, self._set.size)
-        _, counts = np.unique(vals.ravel(), return_counts=True)
-        energy = int(np.sum(counts.astype(int) ** 2))
-        self.energies[("mult", int(k))] = energy
-        return self.energies[("mult", int(k))]
+        return self._energy("mult", k)
 
     def _clear_cache(self) -> None:
-        self.add_cache = {}
-        self.diff_cache = {}
-        self.mult_cache = {}
-        self.rep_add_cache = {}
-        self.rep_diff_cache = {}
-        self.rep_mult_cache = {}
-        self.energies = {}
+        self._caches = None
 
     def _normalize(self) -> None:
-        if isinstance(self._set, np.ndarray):
+        if isinstance(self._set, np.ndarray) and self._set.dtype != object:
             a = self._set
         else:
-            a = np.asarray(self._set, dtype=int)
+            a = exact(self._set)
         if a.size == 0:
             raise ValueError("self._set cannot be empty!")
-        if a.dtype != int:
+        if a.dtype != int and a.dtype != object:
             a = a.astype(int, copy=False)
-        a = np.unique(a)
+        a = _unique(a)
         self._set = a
 
+    def sumset(self, other: CombSet, method: str = "auto") -> CombSet:
+        if self is other:
+            if 2 in self.add_cache:
+                return self.add_cache[2]
+            self.add_cache[2] = self._shared_set("add", 2, lambda: CombSet.from_sorted(_sumset(self._set, self._set, method)))
+            return self.add_cache[2]
+        return CombSet.from_sorted(_sumset(self._set, other._set, method))
+
+    def difference_set(self, other: CombSet, method: str = "auto") -> CombSet:
+        if self is other:
+            if 2 in self.diff_cache:
+                return self.diff_cache[2]
+            self.diff_cache[2] = self._shared_set("diff", 2, lambda: CombSet.from_sorted(_diffset(self._set, self._set, method)))
+            return self.diff_cache[2]
+        return CombSet.from_sorted(_diffset(self._set, other._set, method))
+
+    def iter_sumsets(self, n: Optional[int] = None, counts: bool = False) -> Iterator[Union[CombSet, int]]:
+        growth = _sumset_growth(self._set)
+        state = self._cache("growth")
+        if growth is None:
+            state["found"] = None
+        level = self._set
+        linear = False
+        k = 1
+        while n is None or k <= n:
+            if linear:
+                yield growth.count(k) if counts else CombSet.from_sorted(growth.level(k))
+            else:
+                if k > 1:
+                    level = _sumset(level, self._set)
+                linear = growth is not None and growth.holds(k, level.size)
+                state["checked"] = max(state.get("checked", 0), k)
+                if linear:
+                    state["found"] = (growth.slope, growth.constant, k)
+                if counts:
+                    yield int(level.size)
+                else:
+                    yield self if k == 1 else CombSet.from_sorted(level)
+            k += 1
+
+    def linear_growth(self, max_k: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        state = self._cache("growth")
+        if "found" not in state and (max_k is None or state.get("checked", 0) < max_k):
+            for _ in self.iter_sumsets(max_k, counts=True):
+                if "found" in state:
+                    break
+        found = state.get("found")
+        if found is None or (max_k is not None and found[2] > max_k):
+            return None
+        return found
+
+    def sumset_chain(self, n: int) -> List[CombSet]:
+        return self._chain(n, "add")
+
+    def product_chain(self, n: int) -> List[CombSet]:
+        return self._chain(n, "mult")
+
+    def _folds(self, op: str) -> Tuple[Dict[int, CombSet], Any]:
+        if op == "add":
+            return self.add_cache, CombSet.__add__
+        return self.mult_cache, CombSet.__mul__
+
+    def _chain(self, n: int, op: str) -> List[CombSet]:
+        cache, combine = self._folds(op)
+        chain = []
+        current = self
+        for i in range(2, int(n) + 1):
+            if i not in cache:
+                cache[i] = self._shared_set(op, i, lambda: combine(current, self))
+            current = cache[i]
+            chain.append(current)
+        return chain
+
+    def _fold(self, k: int, op: str) -> CombSet:
+        cache, combine = self._folds(op)
+        if k in cache:
+            return cache[k]
+        if k == 1:
+            cache[1] = CombSet.from_sorted(self._set.copy())
+            return cache[1]
+        start = max((m for m in cache if 1 < m <= k), default=1)
+        result = cache[start] if start > 1 else self
+        rest = k - start
+        power, step, done = self, 1, start
+        while rest:
+            if rest & 1:
+                done += step
+                if done not in cache:
+                    cache[done] = self._shared_set(op, done, lambda: combine(result, power))
+                result = cache[done]
+            rest >>= 1
+            step <<= 1
+            if rest:
+                if step not in cache:
+                    cache[step] = self._shared_set(op, step, lambda: combine(power, power))
+                power = cache[step]
+        return result
+
     def __add__(self, other: Union[CombSet, int]) -> CombSet:
         if not isinstance(other, CombSet):
             if isinstance(other, int):
                 return self.translate(other)
             raise(TypeError)
-        if self is other:
-            if 2 in self.add_cache:
-                return self.add_cache[2]
-        new_set = np.add.outer(self._set, other._set).ravel()
-        if self is other:
-            self.add_cache[2] = CombSet(new_set)
-            return self.add_cache[2]
-        return CombSet(new_set)
+        return self.sumset(other)
 
     def __sub__(self, other: Union[CombSet, int]) -> CombSet:
         if not isinstance(other, CombSet):
             if isinstance(other, int):
                 return self.translate(-other)
             raise(TypeError)
-        if self is other:
-            if 2 in self.diff_cache:
-                return self.diff_cache[2]
-        new_set = np.subtract.outer(self._set, other._set).ravel()
-        if self is other:
-            self.diff_cache[2] = CombSet(new_set)
-            return self.diff_cache[2]
-        return CombSet(new_set)
+        return self.difference_set(other)
 
     def __rmul__(self, other: int) -> CombSet:
         if isinstance(other, int):
@@ -339,30 +1158,22 @@ class CombSet():
                 result = -(abs(other) * self)
                 self.add_cache[other] = result
                 return result
-            result = CombSet(self._set.copy())
-            times = other-1
-            while times > 0:
-                result += self
-                times -= 1
-            self.add_cache[other] = result
-            return result
+            return self._fold(other, "add")
         raise TypeError("Multiplication is only supported for CombSet * CombSet, int * CombSet, and CombSet * int.")
 
     def __mul__(self, other: Union[int, CombSet]) -> CombSet:
         if isinstance(other, int):
             if other == 0:
                 return CombSet([0])
-            new_set = self._set * int(other)
-            return CombSet(new_set)
+            new_set = _scale(self._set, int(other))
+            return CombSet.from_sorted(new_set if other > 0 else new_set[::-1].copy())
         if isinstance(other, CombSet):
             if self is other:
                 if 2 in self.mult_cache:
                     return self.mult_cache[2]
-            prod_set = np.multiply.outer(self._set, other._set).ravel()
-            if self is other:
-                self.mult_cache[2] = CombSet(prod_set)
+                self.mult_cache[2] = self._shared_set("mult", 2, lambda: CombSet.from_sorted(_products(self._set, self._set)))
                 return self.mult_cache[2]
-            return CombSet(prod_set)
+            return CombSet.from_sorted(_products(self._set, other._set))
         raise TypeError("Multiplication is only supported for CombSet * CombSet, int * CombSet, and CombSet * int.")
 
     def __pow__(self, other: int) -> CombSet:
@@ -371,15 +1182,7 @@ class CombSet():
                 return CombSet([1])
             if other < 0:
                 raise TypeError("Negative exponentiation is not supported.")
-            if other in self.mult_cache:
-                return self.mult_cache[other]
-            current = CombSet(self._set.copy())
-            n = other
-            while n > 1:
-                current *= self
-                n -= 1
-            self.mult_cache[other] = current
-            return self.mult_cache[other]
+            return self._fold(other, "mult")
         raise TypeError("Exponentiation is only supported for CombSet ** int.")
 
 
@@ -396,6 +1199,6 @@ class CombSet():
             return False
         
     def __neg__(self) -> CombSet:
-        return CombSet((-self._set))
+        return CombSet.from_sorted(_scale(self._set, -1)[::-1].copy())
 
     __repr__ = __str__
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sets (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (key, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS powerset (
+    mask INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+_FETCH_BATCH = 900
+
+
+def _encode_key(key: Tuple[Any, ...]) -> str:
+    size, translate, digest = key
+    return f"{size}:{int(translate)}:{digest.hex()}"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Fraction):
+        return str(value)
+    return value
+
+
+class InvariantStore():
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, key: Tuple[Any, ...], name: str) -> Optional[int]:
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT value FROM sets WHERE key = ? AND name = ?", (_encode_key(key), name)
+            ).fetchone()
+        return None if found is None else int(found[0])
+
+    def put(self, key: Tuple[Any, ...], name: str, value: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sets (key, name, value) VALUES (?, ?, ?)",
+                (_encode_key(key), name, str(int(value)))
+            )
+
+    def fetch_rows(self, masks: Sequence[int], columns: Sequence[str]) -> Dict[int, List[Any]]:
+        rows = {}
+        masks = list(masks)
+        with self._lock:
+            for lo in range(0, len(masks), _FETCH_BATCH):
+                batch = masks[lo:lo + _FETCH_BATCH]
+                query = f"SELECT mask, data FROM powerset WHERE mask IN ({','.join('?' * len(batch))})"
+                for mask, data in self._conn.execute(query, batch):
+                    values = json.loads(data)
+                    if all(c in values for c in columns):
+                        rows[mask] = [mask] + [values[c] for c in columns]
+        return rows
+
+    def put_rows(self, columns: Sequence[str], rows: Sequence[List[Any]]) -> None:
+        if not rows:
+            return
+        data = [
+            (row[0], json.dumps({c: _encode_value(v) for c, v in zip(columns, row[1:])}))
+            for row in rows
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO powerset (mask, data) VALUES (?, ?) "
+                "ON CONFLICT(mask) DO UPDATE SET data = json_patch(data, excluded.data)",
+                data
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_active: Optional[InvariantStore] = None
+
+
+def open_store(path: str = "ookami_store.sqlite") -> InvariantStore:
+    global _active
+    close_store()
+    _active = InvariantStore(path)
+    return _active
+
+
+def close_store() -> None:
+    global _active
+    if _active is not None:
+        _active.close()
+        _active = None
+
+
+def active_store() -> Optional[InvariantStore]:
+    return _active
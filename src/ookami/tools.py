@@ -1,11 +1,22 @@
 import os
 import csv
+import json
+import math
 import time
+import heapq
+import shutil
 import random as rand
 import multiprocessing as mp
+import numpy as np
+from collections import Counter
 from dataclasses import dataclass
+from fractions import Fraction
+from functools import cached_property
 from ookami import CombSet
-from typing import Any, List, Tuple, Union
+from ookami._common import BATCH_ENTRIES, check_rand_range, distinct_and_energy, fits_int64, rand_rows, seeded_rng
+from ookami.bitset import BitSet, diffset_mask, energy_add_mask, is_ap_mask, is_gp_elements, mask_bits, products, sumset_mask
+from ookami.store import InvariantStore
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 HEADER = [
     "set", "add_ds_card", "diff_ds_card", "mult_ds_card",
@@ -17,36 +28,431 @@ MIN_HEADER = [
     "set", "add_ds_card", "mult_ds_card"
 ]
 
+CANONICAL_HEADER = [
+    "set", "add_ds_card", "diff_ds_card", "set_cardinality", "diameter",
+    "density", "dc", "is_ap", "add_energy", "multiplicity"
+]
 
-def _mask_to_subset(mask: int, n: int) -> tuple[int, ...]:
-    return tuple(i + 1 for i in range(n) if (mask >> i) & 1)
-
-
-def _compute_row(subset: tuple[int, ...], mask: int) -> List[Any]:
-    S = CombSet(subset)
-    info = S.info()
-    return [
-        mask,
-        info["add_ds"].cardinality,
-        info["diff_ds"].cardinality,
-        info["mult_ds"].cardinality,
-        info["cardinality"],
-        info["diameter"],
-        info["density"],
-        str(info["dc"]),
-        info["is_ap"],
-        info["is_gp"],
-        info["add_energy"],
-        info["mult_energy"],
-    ]
+COLUMNS = tuple(HEADER[1:])
+
+INVARIANT_COLUMNS = tuple(CANONICAL_HEADER[1:-1])
+
+_SCALED_COLUMNS = ("diameter", "density")
+
+SYMMETRY_MODES = ("none", "canonical", "expand")
+
+OUTPUT_FORMATS = ("csv", "npy")
+
+SCHEDULES = ("static", "balanced")
+
+NPY_DTYPES = {
+    "set": np.uint64,
+    "add_ds_card": np.uint32,
+    "diff_ds_card": np.uint32,
+    "mult_ds_card": np.uint32,
+    "set_cardinality": np.uint32,
+    "diameter": np.uint32,
+    "density": np.uint32,
+    "dc": np.uint32,
+    "is_ap": np.bool_,
+    "is_gp": np.bool_,
+    "add_energy": np.uint64,
+    "mult_energy": np.uint64,
+    "multiplicity": np.uint64,
+}
+
+FRACTION_COLUMNS = ("density", "dc")
+
+_STORE_BLOCK = 4096
+
+_BLOCKS_PER_TASK = 64
+
+# Microseconds per row for a subset of size p: (constant, per p, per p^2), fitted
+# by least squares to timings of _compute_row for every p at n = 22.
+_ROW_BASE_COST = 1.1
+
+_COLUMN_COSTS = {
+    "add_ds_card": (1.65, 0.32, 0.0),
+    "diff_ds_card": (0.58, 0.33, 0.0),
+    "mult_ds_card": (0.84, 1.23, 0.0),
+    "set_cardinality": (0.25, 0.0, 0.0),
+    "diameter": (0.42, 0.0, 0.0),
+    "density": (1.65, 0.02, 0.0),
+    "dc": (3.76, 0.30, 0.0),
+    "is_ap": (0.57, 0.06, 0.0),
+    "is_gp": (2.44, 0.41, 0.0),
+    "add_energy": (2.12, 0.21, 0.0),
+    "mult_energy": (2.39, 2.16, 0.177),
+}
+
+_SAMPLE_BLOCK = 1024
+
+
+def _mask_elements(mask: int) -> List[int]:
+    return [i + 1 for i in mask_bits(mask)]
+
+
+class _MaskRow():
+    def __init__(self, mask: int, columns: Sequence[str]) -> None:
+        self.mask = mask
+        self.count_products = "mult_energy" in columns
+
+    @cached_property
+    def elements(self) -> List[int]:
+        return _mask_elements(self.mask)
+
+    @cached_property
+    def products(self) -> Counter:
+        return products(self.elements)
+
+    @cached_property
+    def add_ds_card(self) -> int:
+        return sumset_mask(self.mask).bit_count()
+
+    @property
+    def diff_ds_card(self) -> int:
+        return diffset_mask(self.mask).bit_count()
+
+    @property
+    def mult_ds_card(self) -> int:
+        if self.count_products:
+            return len(self.products)
+        elements = self.elements
+        return len({a * b for i, a in enumerate(elements) for b in elements[i:]})
+
+    @property
+    def set_cardinality(self) -> int:
+        return self.mask.bit_count()
+
+    @property
+    def diameter(self) -> int:
+        return self.mask.bit_length() - (self.mask & -self.mask).bit_length()
+
+    @property
+    def density(self) -> Fraction:
+        return Fraction(self.set_cardinality, self.diameter + 1)
+
+    @property
+    def dc(self) -> str:
+        return str(Fraction(self.add_ds_card, self.set_cardinality))
+
+    @property
+    def is_ap(self) -> bool:
+        return is_ap_mask(self.mask)
+
+    @property
+    def is_gp(self) -> bool:
+        return is_gp_elements(self.elements)
+
+    @property
+    def add_energy(self) -> int:
+        return energy_add_mask(self.mask)
+
+    @property
+    def mult_energy(self) -> int:
+        return sum(c * c for c in self.products.values())
+
+
+class _Stats():
+    def __init__(self, profile: bool = False) -> None:
+        self.profile = profile
+        self.stages: Dict[str, float] = {}
+        self.columns: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def values(self, row: Any, columns: Sequence[str]) -> List[Any]:
+        if not self.profile:
+            return [getattr(row, c) for c in columns]
+        values = []
+        for c in columns:
+            t = time.perf_counter()
+            values.append(getattr(row, c))
+            self.columns[c] = self.columns.get(c, 0.0) + time.perf_counter() - t
+        return values
+
+
+class _TimedStore():
+    def __init__(self, store: InvariantStore, stats: _Stats) -> None:
+        self.store = store
+        self.stats = stats
+
+    def fetch_rows(self, masks: Sequence[int], columns: Sequence[str]) -> Dict[int, List[Any]]:
+        t = time.perf_counter()
+        rows = self.store.fetch_rows(masks, columns)
+        self.stats.add("store", time.perf_counter() - t)
+        return rows
+
+    def put_rows(self, columns: Sequence[str], rows: Sequence[List[Any]]) -> None:
+        t = time.perf_counter()
+        self.store.put_rows(columns, rows)
+        self.stats.add("store", time.perf_counter() - t)
+
+
+def _compute_row(mask: int, columns: Sequence[str], stats: Optional[_Stats] = None) -> List[Any]:
+    row = _MaskRow(mask, columns)
+    if stats is None:
+        return [mask] + [getattr(row, c) for c in columns]
+    return [mask] + stats.values(row, columns)
+
+
+def _reflect(mask: int) -> int:
+    return int(format(mask, "b")[::-1], 2)
+
+
+def _normal_mask(mask: int) -> Tuple[int, int]:
+    if mask & 2:
+        return mask, 1
+    bits = list(mask_bits(mask))
+    step = math.gcd(*bits)
+    if step <= 1:
+        return mask, 1
+    normal = sum(1 << (b // step) for b in bits)
+    return min(normal, _reflect(normal)), step
+
+
+def _class_masks(mask: int, n: int) -> List[int]:
+    width = mask.bit_length()
+    shapes = {mask, _reflect(mask)}
+    return sorted(shape << t for shape in shapes for t in range(n - width + 1))
+
+
+def _store_blocks(positions: range, start: int) -> Iterator[range]:
+    for lo in range(start, len(positions), _STORE_BLOCK):
+        yield range(lo, min(lo + _STORE_BLOCK, len(positions)))
+
+
+def _symmetry_rows(positions: range, start: int, n: int, columns: Sequence[str], symmetry: str, store: Optional[InvariantStore] = None, stats: Optional[_Stats] = None) -> Iterator[Tuple[int, List[Any]]]:
+    if stats is None:
+        stats = _Stats()
+    invariant = [c for c in columns if c in INVARIANT_COLUMNS]
+    others = [c for c in columns if c not in INVARIANT_COLUMNS]
+    scaled = [c for c in invariant if c in _SCALED_COLUMNS]
+    normals: Dict[int, Dict[str, Any]] = {}
+    for block in _store_blocks(positions, start):
+        known = store.fetch_rows([positions[p] for p in block], invariant) if store and invariant else {}
+        fresh = []
+        for pos in block:
+            mask = positions[pos]
+            if _reflect(mask) < mask:
+                continue
+            members = _class_masks(mask, n)
+            if mask in known:
+                shared = dict(zip(invariant, known[mask][1:]))
+            else:
+                canonical = _MaskRow(mask, columns)
+                normal, step = _normal_mask(mask)
+                if step == 1:
+                    shared = dict(zip(invariant, stats.values(canonical, invariant)))
+                else:
+                    if normal not in normals:
+                        row = store.fetch_rows([normal], invariant).get(normal) if store and invariant else None
+                        if row is not None:
+                            normals[normal] = dict(zip(invariant, row[1:]))
+                        else:
+                            normals[normal] = dict(zip(invariant, stats.values(_MaskRow(normal, columns), invariant)))
+                    shared = dict(normals[normal], **dict(zip(scaled, stats.values(canonical, scaled))))
+                fresh.append([mask] + [shared[c] for c in invariant])
+            if symmetry == "canonical":
+                yield pos, [mask] + [shared[c] for c in columns] + [len(members)]
+                continue
+            for member in members:
+                own = dict(zip(others, stats.values(_MaskRow(member, columns), others)))
+                yield pos, [member] + [shared[c] if c in shared else own[c] for c in columns]
+        if store and invariant:
+            store.put_rows(invariant, fresh)
+
+
+def _bump(counts: np.ndarray, idx: np.ndarray, delta: int) -> Tuple[int, int]:
+    old = counts[idx]
+    new = old + delta
+    counts[idx] = new
+    card = int(np.count_nonzero(new)) - int(np.count_nonzero(old))
+    energy = int(np.dot(new, new)) - int(np.dot(old, old))
+    return card, energy
+
+
+class _IncrementalRow():
+    def __init__(self, n: int, columns: Sequence[str] = COLUMNS) -> None:
+        self.n = n
+        self.track_add = any(c in columns for c in ("add_ds_card", "dc", "add_energy"))
+        self.track_diff = "diff_ds_card" in columns
+        self.track_mult = any(c in columns for c in ("mult_ds_card", "mult_energy"))
+        self.members = np.zeros(n + 1, dtype=bool)
+        self.add_counts = np.zeros(2 * n + 1, dtype=np.int64)
+        self.diff_counts = np.zeros(2 * n + 1, dtype=np.int64)
+        self.mult_counts = np.zeros(n * n + 1, dtype=np.int64)
+        self.add_ds_card = 0
+        self.diff_ds_card = 0
+        self.mult_ds_card = 0
+        self.add_energy = 0
+        self.mult_energy = 0
+        self.elems = np.zeros(0, dtype=np.int64)
+        self.mask = 0
+
+    def sync(self, mask: int) -> None:
+        for i in mask_bits(self.mask ^ mask):
+            self.toggle(i + 1)
+
+    def toggle(self, x: int) -> None:
+        self.mask ^= 1 << (x - 1)
+        if self.members[x]:
+            self.members[x] = False
+            self._update(x, -1)
+        else:
+            self._update(x, 1)
+            self.members[x] = True
+        self.elems = np.flatnonzero(self.members)
+
+    def _update(self, x: int, sign: int) -> None:
+        n = self.n
+        elems = np.flatnonzero(self.members)
+        self_pair = np.array([x])
+
+        if self.track_add:
+            card, energy = _bump(self.add_counts, elems + x, 2 * sign)
+            c, e = _bump(self.add_counts, 2 * self_pair, sign)
+            self.add_ds_card += card + c
+            self.add_energy += energy + e
+
+        if self.track_diff:
+            c1, _ = _bump(self.diff_counts, x - elems + n, sign)
+            c2, _ = _bump(self.diff_counts, elems - x + n, sign)
+            c3, _ = _bump(self.diff_counts, np.array([n]), sign)
+            self.diff_ds_card += c1 + c2 + c3
+
+        if self.track_mult:
+            card, energy = _bump(self.mult_counts, elems * x, 2 * sign)
+            c, e = _bump(self.mult_counts, self_pair * x, sign)
+            self.mult_ds_card += card + c
+            self.mult_energy += energy + e
+
+    @property
+    def set_cardinality(self) -> int:
+        return int(self.elems.size)
+
+    @property
+    def diameter(self) -> int:
+        return int(self.elems[-1] - self.elems[0])
+
+    @property
+    def density(self) -> Fraction:
+        return Fraction(self.set_cardinality, self.diameter + 1)
+
+    @property
+    def dc(self) -> str:
+        return str(Fraction(self.add_ds_card, self.set_cardinality))
+
+    @property
+    def is_ap(self) -> bool:
+        if self.elems.size <= 2:
+            return True
+        gaps = np.diff(self.elems)
+        return bool(np.all(gaps == gaps[0]))
+
+    @property
+    def is_gp(self) -> bool:
+        elems = self.elems
+        if elems.size <= 2:
+            return True
+        return bool(np.all(elems[2:] * elems[0] == elems[1:-1] * elems[1]))
+
+
+def _gray_rows(positions: range, start: int, n: int, columns: Sequence[str], store: Optional[InvariantStore] = None, stats: Optional[_Stats] = None) -> Iterator[Tuple[int, List[Any]]]:
+    if stats is None:
+        stats = _Stats()
+    state = _IncrementalRow(n, columns)
+    for block in _store_blocks(positions, start):
+        masks = [positions[p] ^ (positions[p] >> 1) for p in block]
+        known = store.fetch_rows(masks, columns) if store else {}
+        fresh = []
+        for pos, mask in zip(block, masks):
+            if mask == 0:
+                continue
+            if mask in known:
+                yield pos, known[mask]
+                continue
+            t = time.perf_counter()
+            state.sync(mask)
+            stats.add("toggle", time.perf_counter() - t)
+            row = [mask] + stats.values(state, columns)
+            fresh.append(row)
+            yield pos, row
+        if store:
+            store.put_rows(columns, fresh)
+
+
+def _stride_rows(positions: range, start: int, n: int, columns: Sequence[str], store: Optional[InvariantStore] = None, stats: Optional[_Stats] = None) -> Iterator[Tuple[int, List[Any]]]:
+    for block in _store_blocks(positions, start):
+        known = store.fetch_rows([positions[p] for p in block], columns) if store else {}
+        fresh = []
+        for pos in block:
+            mask = positions[pos]
+            if mask == 0:
+                continue
+            if mask in known:
+                yield pos, known[mask]
+                continue
+            row = _compute_row(mask, columns, stats)
+            fresh.append(row)
+            yield pos, row
+        if store:
+            store.put_rows(columns, fresh)
+
+
+def _npy_columns(header: List[str]) -> List[str]:
+    columns = []
+    for name in header:
+        if name in FRACTION_COLUMNS:
+            columns += [f"{name}_num", f"{name}_den"]
+        else:
+            columns.append(name)
+    return columns
+
+
+def _npy_path(out_dir: str, n: int, column: str) -> str:
+    return os.path.join(out_dir, f"set_info_{n}_{column}.npy")
+
+
+def _allocate_npy(out_dir: str, n: int, header: List[str]) -> None:
+    for name in header:
+        dtype = NPY_DTYPES[name]
+        for column in _npy_columns([name]):
+            arr = np.lib.format.open_memmap(_npy_path(out_dir, n, column), mode="w+", dtype=dtype, shape=(1 << n,))
+            del arr
+
+
+class _NpyWriter():
+    def __init__(self, out_dir: str, n: int, header: List[str]) -> None:
+        self.header = header
+        self.columns = {
+            column: np.load(_npy_path(out_dir, n, column), mmap_mode="r+")
+            for column in _npy_columns(header)
+        }
+
+    def writerows(self, rows: List[List[Any]]) -> None:
+        masks = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        for j, name in enumerate(self.header):
+            if name in FRACTION_COLUMNS:
+                values = [Fraction(row[j]) for row in rows]
+                self.columns[f"{name}_num"][masks] = [v.numerator for v in values]
+                self.columns[f"{name}_den"][masks] = [v.denominator for v in values]
+            else:
+                self.columns[name][masks] = [row[j] for row in rows]
+
+    def flush(self) -> None:
+        for arr in self.columns.values():
+            arr.flush()
+
+
+def load_powerset_info(n: int, out_dir: str) -> Dict[str, np.ndarray]:
+    manifest = _read_json(os.path.join(_checkpoint_dir(out_dir, n), "manifest.json"))
+    if manifest is None or manifest["output"] != "npy":
+        raise ValueError(f"no output='npy' sweep for n={n} in {out_dir}")
+    header = _task_header(manifest["columns"], manifest["symmetry"])
+    return {column: np.load(_npy_path(out_dir, n, column), mmap_mode="r") for column in _npy_columns(header)}
 
-def _compute_row_min(subset: tuple[int, ...], mask: int) -> List[Any]:
-    S = CombSet(subset)
-    return [
-        mask,
-        (S.ads).cardinality,
-        (S.mds).cardinality
-    ]
 
 @dataclass(frozen=True)
 class WorkerTask:
@@ -55,46 +461,273 @@ class WorkerTask:
     k: int
     flush_every: int
     out_dir: str
-    minimal: bool
+    columns: Tuple[str, ...]
+    gray_code: bool = False
+    symmetry: str = "none"
+    output: str = "csv"
+    resume: bool = False
+    store: Optional[str] = None
+    profile: bool = False
+    lo: int = 0
+    hi: int = 0
 
 
-def _worker(task: WorkerTask) -> str:
-    chunk_id, n, k, flush_every, out_dir = (
-        task.chunk_id, task.n, task.k, task.flush_every, task.out_dir
+def _task_header(columns: Sequence[str], symmetry: str) -> List[str]:
+    if symmetry == "canonical":
+        return ["set"] + list(columns) + ["multiplicity"]
+    return ["set"] + list(columns)
+
+
+def _task_positions(task: WorkerTask) -> range:
+    total = 1 << task.n
+    if task.hi > task.lo:
+        return range(task.lo, task.hi)
+    if task.symmetry != "none":
+        return range(2 * task.chunk_id + 1, total, 2 * task.k)
+    if task.gray_code:
+        return range(task.chunk_id * total // task.k, (task.chunk_id + 1) * total // task.k)
+    return range(task.chunk_id, total, task.k)
+
+
+def _task_rows(task: WorkerTask, start: int = 0, store: Optional[InvariantStore] = None, stats: Optional[_Stats] = None) -> Iterator[Tuple[int, List[Any]]]:
+    positions = _task_positions(task)
+    if stats is not None and store is not None:
+        store = _TimedStore(store, stats)
+    if task.symmetry != "none":
+        return _symmetry_rows(positions, start, task.n, task.columns, task.symmetry, store, stats)
+    if task.gray_code:
+        return _gray_rows(positions, start, task.n, task.columns, store, stats)
+    return _stride_rows(positions, start, task.n, task.columns, store, stats)
+
+
+def _write_rows(w: Any, rows: Iterator[Tuple[int, List[Any]]], flush_every: int, on_flush: Callable[[int, int, bool], None], stats: Optional[_Stats] = None) -> int:
+    if stats is None:
+        stats = _Stats()
+    buf: list[list] = []
+    last, last_mask = -1, -1
+    count = 0
+    rows = iter(rows)
+    while True:
+        t = time.perf_counter()
+        item = next(rows, None)
+        stats.add("rows", time.perf_counter() - t)
+        if item is None:
+            break
+        pos, row = item
+        if len(buf) >= flush_every and pos != last:
+            last_mask = _flush_rows(w, buf, stats)
+            t = time.perf_counter()
+            on_flush(last + 1, last_mask, False)
+            stats.add("flush", time.perf_counter() - t)
+        buf.append(row)
+        count += 1
+        last = pos
+
+    if buf:
+        last_mask = _flush_rows(w, buf, stats)
+    t = time.perf_counter()
+    on_flush(last + 1, last_mask, True)
+    stats.add("flush", time.perf_counter() - t)
+    return count
+
+
+def _flush_rows(w: Any, buf: List[List[Any]], stats: _Stats) -> int:
+    t = time.perf_counter()
+    w.writerows(buf)
+    stats.add("write", time.perf_counter() - t)
+    last_mask = buf[-1][0]
+    buf.clear()
+    return last_mask
+
+
+def _checkpoint_dir(out_dir: str, n: int) -> str:
+    return os.path.join(out_dir, f"checkpoint_{n}")
+
+
+def _checkpoint_path(out_dir: str, n: int, chunk_id: int) -> str:
+    return os.path.join(_checkpoint_dir(out_dir, n), f"chunk_{chunk_id+1:04d}.json")
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _worker(task: WorkerTask) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    stats = _Stats(task.profile)
+    store = InvariantStore(task.store) if task.store is not None else None
+    try:
+        path, rows = _run_worker(task, store, stats)
+    finally:
+        if store is not None:
+            store.close()
+    return {
+        "chunk": task.chunk_id + 1,
+        "path": path,
+        "rows": rows,
+        "seconds": time.perf_counter() - t0,
+        "stages": stats.stages,
+        "columns": stats.columns,
+    }
+
+
+def _run_worker(task: WorkerTask, store: Optional[InvariantStore], stats: _Stats) -> Tuple[str, int]:
+    chunk_id, n, flush_every, out_dir = (
+        task.chunk_id, task.n, task.flush_every, task.out_dir
     )
 
-    total = 1 << n
     file_id = chunk_id+1
+    header = _task_header(task.columns, task.symmetry)
+    ckpt_path = _checkpoint_path(out_dir, n, chunk_id)
+    ckpt = _read_json(ckpt_path) if task.resume else None
+    start = ckpt["next"] if ckpt else 0
+
+    if task.output == "npy":
+        path = f"chunk {file_id:04d} to {out_dir}"
+        if ckpt and ckpt["done"]:
+            return path, 0
+        w = _NpyWriter(out_dir, n, header)
+
+        def on_flush(next_pos: int, last_mask: int, done: bool) -> None:
+            w.flush()
+            _write_json(ckpt_path, {"next": next_pos, "last_mask": last_mask, "done": done})
+
+        rows = _write_rows(w, _task_rows(task, start, store, stats), flush_every, on_flush, stats)
+        return path, rows
+
     path = os.path.join(out_dir, f"set_info_{n}_{file_id:04d}.csv")
+    if ckpt and ckpt["done"]:
+        return path, 0
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    with open(path, "r+" if ckpt else "w", newline="", encoding="utf-8") as f:
+        if ckpt:
+            f.truncate(ckpt["offset"])
+            f.seek(ckpt["offset"])
         w = csv.writer(f)
-        if task.minimal:
-            w.writerow(MIN_HEADER)
-            to_call = _compute_row_min
-        else:
-            w.writerow(HEADER)
-            to_call = _compute_row
+        if not ckpt:
+            w.writerow(header)
 
-        buf: list[list] = []
-        for mask in range(chunk_id, total, k):
-            if mask == 0:
-                continue
-            subset = _mask_to_subset(mask, n)
-            buf.append(to_call(subset, mask))
+        def on_flush(next_pos: int, last_mask: int, done: bool) -> None:
+            f.flush()
+            os.fsync(f.fileno())
+            _write_json(ckpt_path, {"next": next_pos, "last_mask": last_mask, "offset": f.tell(), "done": done})
+
+        rows = _write_rows(w, _task_rows(task, start, store, stats), flush_every, on_flush, stats)
+
+    return path, rows
+
+
+def _row_cost(columns: Sequence[str], popcount: float, popcount_sq: float) -> float:
+    cost = _ROW_BASE_COST
+    for name in columns:
+        fixed, linear, quadratic = _COLUMN_COSTS[name]
+        cost += fixed + linear * popcount + quadratic * popcount_sq
+    return cost
+
+
+def _balanced_ranges(n: int, tasks: int, gray_code: bool, columns: Sequence[str] = COLUMNS) -> List[Tuple[int, int, float]]:
+    free = max(0, n - (tasks * _BLOCKS_PER_TASK - 1).bit_length())
+    size = 1 << free
+    costs = []
+    for high in range(1 << (n - free)):
+        fixed = (high ^ (high >> 1) if gray_code else high).bit_count()
+        mean = fixed + free / 2
+        costs.append(size * _row_cost(columns, mean, mean * mean + free / 4))
+
+    total = sum(costs)
+    ranges = []
+    lo, acc, spent = 0, 0.0, 0.0
+    for high, cost in enumerate(costs):
+        acc += cost
+        boundary = total * (len(ranges) + 1) / tasks
+        if acc >= boundary or high == len(costs) - 1:
+            hi = (high + 1) * size
+            ranges.append((lo, hi, acc - spent))
+            lo, spent = hi, acc
+        if len(ranges) == tasks - 1 and high < len(costs) - 1:
+            ranges.append((lo, 1 << n, total - spent))
+            break
+    return ranges
 
-            if len(buf) >= flush_every:
-                w.writerows(buf)
-                buf.clear()
 
-        if buf:
-            w.writerows(buf)
-            buf.clear()
+def _print_progress(event: Dict[str, Any]) -> None:
+    if event["event"] == "chunk":
+        print(f"{event['percent']}% done, wrote {event['path']}, {event['elapsed']:.1f}s since start")
 
-    return path
 
+class _Progress():
+    def __init__(self, n: int, chunks: int, t0: float, callback: Optional[Callable[[Dict[str, Any]], None]], stats_path: Optional[str]) -> None:
+        self.n = n
+        self.chunks = chunks
+        self.t0 = t0
+        self.callback = callback if callback is not None else _print_progress
+        self.stats_path = stats_path
+        self.done = 0
+        self.rows = 0
+        self.seconds: List[float] = []
+        self.stages: Dict[str, float] = {}
+        self.columns: Dict[str, float] = {}
+        if stats_path is not None:
+            open(stats_path, "w", encoding="utf-8").close()
 
-def _export_powerset_info(n: int, out_dir: str, jobs: int, k: int, flush_every: int, min_computation: bool = False, mp_context: str = "fork") -> None:
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if self.stats_path is not None:
+            with open(self.stats_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+        self.callback(event)
+
+    def chunk_done(self, result: Dict[str, Any]) -> None:
+        self.done += 1
+        self.rows += result["rows"]
+        self.seconds.append(result["seconds"])
+        for total, part in ((self.stages, result["stages"]), (self.columns, result["columns"])):
+            for name, value in part.items():
+                total[name] = total.get(name, 0.0) + value
+        elapsed = time.time() - self.t0
+        self._emit({
+            "event": "chunk",
+            **result,
+            "done": self.done,
+            "chunks": self.chunks,
+            "percent": (100*self.done)//self.chunks,
+            "elapsed": elapsed,
+            "rows_per_second": self.rows / elapsed if elapsed > 0 else 0.0,
+            "eta": elapsed * (self.chunks - self.done) / self.done,
+        })
+
+    def finish(self) -> Dict[str, Any]:
+        elapsed = time.time() - self.t0
+        seconds = sorted(self.seconds)
+        median = seconds[len(seconds) // 2]
+        summary = {
+            "event": "done",
+            "n": self.n,
+            "chunks": self.chunks,
+            "rows": self.rows,
+            "elapsed": elapsed,
+            "rows_per_second": self.rows / elapsed if elapsed > 0 else 0.0,
+            "stages": self.stages,
+            "columns": self.columns,
+            "chunk_seconds": {"min": seconds[0], "median": median, "max": seconds[-1]},
+            "skew": seconds[-1] / median if median > 0 else 1.0,
+        }
+        self._emit(summary)
+        return summary
+
+
+def _export_powerset_info(n: int, out_dir: str, jobs: int, k: int, flush_every: int, min_computation: bool = False, mp_context: str = "fork", gray_code: bool = False, symmetry: str = "none", output: str = "csv", resume: bool = False, columns: Optional[Sequence[str]] = None, store: Optional[str] = None, progress: Optional[Callable[[Dict[str, Any]], None]] = None, stats_path: Optional[str] = None, profile_columns: bool = False, schedule: str = "static") -> Dict[str, Any]:
     if n < 1:
         raise ValueError("n must be >= 1")
     if jobs < 1:
@@ -103,8 +736,57 @@ def _export_powerset_info(n: int, out_dir: str, jobs: int, k: int, flush_every:
         raise ValueError("k must be >= 1")
     if flush_every < 1:
         raise ValueError("flush_every must be >= 1")
+    if symmetry not in SYMMETRY_MODES:
+        raise ValueError(f"symmetry must be one of {SYMMETRY_MODES}")
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"output must be one of {OUTPUT_FORMATS}")
+    if symmetry != "none" and gray_code:
+        raise ValueError("gray_code cannot be combined with symmetry")
+    if schedule not in SCHEDULES:
+        raise ValueError(f"schedule must be one of {SCHEDULES}")
+    if schedule == "balanced" and symmetry != "none":
+        raise ValueError("schedule='balanced' cannot be combined with symmetry")
+    if columns is None:
+        if min_computation:
+            columns = MIN_HEADER[1:]
+        elif symmetry == "canonical":
+            columns = INVARIANT_COLUMNS
+        else:
+            columns = COLUMNS
+    columns = tuple(columns)
+    if not columns:
+        raise ValueError("columns cannot be empty")
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown columns {unknown}; expected a subset of {COLUMNS}")
+    if len(set(columns)) != len(columns):
+        raise ValueError("columns cannot contain duplicates")
+    if symmetry == "canonical" and any(c not in INVARIANT_COLUMNS for c in columns):
+        raise ValueError(f"symmetry='canonical' only supports the translation/reflection invariant columns {INVARIANT_COLUMNS}; use symmetry='expand' for the others")
 
     os.makedirs(out_dir, exist_ok=True)
+    if store is not None:
+        InvariantStore(store).close()
+
+    ckpt_dir = _checkpoint_dir(out_dir, n)
+    manifest_path = os.path.join(ckpt_dir, "manifest.json")
+    if schedule == "balanced":
+        ranges = _balanced_ranges(n, k*jobs, gray_code, columns)
+    else:
+        ranges = [(0, 0, 0.0)] * (k*jobs)
+    manifest = {
+        "n": n, "chunks": len(ranges), "columns": list(columns), "gray_code": gray_code,
+        "symmetry": symmetry, "output": output, "schedule": schedule,
+    }
+    previous = _read_json(manifest_path) if resume else None
+    if previous is not None and previous != manifest:
+        raise ValueError(f"cannot resume: checkpoint in {ckpt_dir} was written with different parameters {previous}")
+    if previous is None:
+        shutil.rmtree(ckpt_dir, ignore_errors=True)
+        os.makedirs(ckpt_dir)
+        _write_json(manifest_path, manifest)
+        if output == "npy":
+            _allocate_npy(out_dir, n, _task_header(columns, symmetry))
 
     t0 = time.time()
 
@@ -113,34 +795,184 @@ def _export_powerset_info(n: int, out_dir: str, jobs: int, k: int, flush_every:
     except ValueError:
         ctx = mp.get_context()
 
-    tasks = [WorkerTask(i, n, k*jobs, flush_every, out_dir, min_computation) for i in range(k*jobs)]
+    tasks = [WorkerTask(i, n, len(ranges), flush_every, out_dir, columns, gray_code, symmetry, output, previous is not None, store, profile_columns, lo, hi) for i, (lo, hi, _) in enumerate(ranges)]
+    if schedule == "balanced":
+        tasks.sort(key=lambda task: -ranges[task.chunk_id][2])
+    monitor = _Progress(n, len(tasks), t0, progress, stats_path)
 
     with ctx.Pool(processes=jobs) as pool:
-        done = 0
-        for path in pool.imap_unordered(_worker, tasks, chunksize=1):
-            done += 1
-            print(f"{(100*done)//(k*jobs)}% done, wrote {path}, {time.time()-t0:.1f}s since start")
+        for result in pool.imap_unordered(_worker, tasks, chunksize=1):
+            monitor.chunk_done(result)
+
+    return monitor.finish()
 
 compute_powerset_info = _export_powerset_info
 
-def rand_sums(num_sums: int, length1: int, length2: int, min1: int, min2: int, max1: int, max2: int) -> List[Tuple[CombSet, CombSet, CombSet]]:
-    results = []
-    for _ in range(0, num_sums):
-        S1 = CombSet([0])
-        S2 = CombSet([0])
-        S1.rand_set(length=length1, min_element=min1, max_element=max1)
-        S2.rand_set(length=length2, min_element=min2, max_element=max2)
 
+@dataclass(frozen=True)
+class SearchTask:
+    prefix: int
+    depth: int
+    n: int
+    top_k: int
+
+
+_SEARCH_HOOKS: Dict[str, Optional[Callable[[BitSet], Any]]] = {"score": None, "predicate": None, "prune": None}
+
+
+def _init_search(score: Optional[Callable[[BitSet], Any]], predicate: Optional[Callable[[BitSet], bool]], prune: Optional[Callable[[BitSet], bool]]) -> None:
+    _SEARCH_HOOKS.update(score=score, predicate=predicate, prune=prune)
+
+
+def _search_masks(prefix: int, depth: int, n: int, prune: Optional[Callable[[BitSet], bool]]) -> Iterator[int]:
+    stack = [(prefix, depth)]
+    while stack:
+        mask, nxt = stack.pop()
+        if mask:
+            if prune is not None and prune(BitSet(mask, 1)):
+                continue
+            yield mask
+        for b in range(n - 1, nxt - 1, -1):
+            stack.append((mask | (1 << b), b + 1))
+
+
+def _search_worker(task: SearchTask) -> List[Tuple[Any, int]]:
+    score, predicate = _SEARCH_HOOKS["score"], _SEARCH_HOOKS["predicate"]
+    heap: List[Tuple[Any, int]] = []
+    for mask in _search_masks(task.prefix, task.depth, task.n, _SEARCH_HOOKS["prune"]):
+        A = BitSet(mask, 1)
+        if predicate is not None and not predicate(A):
+            continue
+        if score is None:
+            heap.append((None, mask))
+            continue
+        item = (score(A), mask)
+        if len(heap) < task.top_k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return heap
+
+
+def search_powerset(n: int, jobs: int, k: int, score: Optional[Callable[[BitSet], Any]] = None, predicate: Optional[Callable[[BitSet], bool]] = None, top_k: int = 10, prune: Optional[Callable[[BitSet], bool]] = None, mp_context: str = "fork") -> Union[List[Tuple[Any, int]], List[int]]:
+    if n < 1:
+        raise ValueError("n must be >= 1")
+    if jobs < 1:
+        raise ValueError("jobs must be >= 1")
+    if k < 1:
+        raise ValueError("k must be >= 1")
+    if score is None and predicate is None:
+        raise ValueError("at least one of score and predicate must be given")
+    if score is not None and top_k < 1:
+        raise ValueError("top_k must be >= 1")
+
+    depth = min(n, (k*jobs - 1).bit_length())
+    tasks = [SearchTask(prefix, depth, n, top_k) for prefix in range(1 << depth)]
+
+    try:
+        ctx = mp.get_context(mp_context)
+    except ValueError:
+        ctx = mp.get_context()
+
+    found: List[Tuple[Any, int]] = []
+    with ctx.Pool(processes=jobs, initializer=_init_search, initargs=(score, predicate, prune)) as pool:
+        for part in pool.imap_unordered(_search_worker, tasks, chunksize=1):
+            found.extend(part)
+
+    if score is None:
+        return sorted(mask for _, mask in found)
+    return heapq.nlargest(top_k, found)
+
+@dataclass(frozen=True)
+class SampleTask:
+    seed: np.random.SeedSequence
+    count: int
+    length1: int
+    length2: int
+    min1: int
+    min2: int
+    max1: int
+    max2: int
+    stats: bool
+
+
+def _sum_stats(A: np.ndarray, B: np.ndarray) -> Dict[str, np.ndarray]:
+    m = A.shape[0]
+    if A.dtype == object or B.dtype == object or not fits_int64(int(A.min()) + int(B.min()), int(A.max()) + int(B.max())):
+        cards = np.zeros(m, dtype=np.int64)
+        energies = np.zeros(m, dtype=object)
+        for i in range(m):
+            counts = Counter(x + y for x in A[i].tolist() for y in B[i].tolist())
+            cards[i] = len(counts)
+            energies[i] = sum(c * c for c in counts.values())
+        return {"sum_card": cards, "sum_energy": energies}
+
+    width = A.shape[1] * B.shape[1]
+    step = max(1, BATCH_ENTRIES // width)
+    cards, energies = [], []
+    for lo in range(0, m, step):
+        sums = (A[lo:lo + step, :, None] + B[lo:lo + step, None, :]).reshape(-1, width)
+        card, energy = distinct_and_energy(sums, np.ones(sums.shape, dtype=bool))
+        cards.append(card)
+        energies.append(energy)
+    return {"sum_card": np.concatenate(cards), "sum_energy": np.concatenate(energies)}
+
+
+def _sample_worker(task: SampleTask) -> Union[List[Tuple[CombSet, CombSet, CombSet]], Dict[str, np.ndarray]]:
+    rng = np.random.default_rng(task.seed)
+    A = rand_rows(rng, task.count, task.length1, task.min1, task.max1)
+    B = rand_rows(rng, task.count, task.length2, task.min2, task.max2)
+    if task.stats:
+        return _sum_stats(A, B)
+    results = []
+    for a, b in zip(A, B):
+        S1 = CombSet.from_sorted(a)
+        S2 = CombSet.from_sorted(b)
         results.append((S1, S2, S1 + S2))
+    return results
+
+
+def _sample_sums(num_sums: int, length1: int, length2: int, min1: int, min2: int, max1: int, max2: int, seed: Any, jobs: int, mp_context: str, stats: bool) -> List[Any]:
+    if num_sums < 0:
+        raise ValueError("num_sums must be >= 0")
+    if jobs < 1:
+        raise ValueError("jobs must be >= 1")
+    check_rand_range(length1, min1, max1)
+    check_rand_range(length2, min2, max2)
+
+    root = np.random.SeedSequence(int(seeded_rng(seed).integers(1 << 63)))
+    counts = [min(_SAMPLE_BLOCK, num_sums - lo) for lo in range(0, num_sums, _SAMPLE_BLOCK)]
+    tasks = [
+        SampleTask(child, count, length1, length2, min1, min2, max1, max2, stats)
+        for child, count in zip(root.spawn(len(counts)), counts)
+    ]
+    if jobs == 1 or len(tasks) < 2:
+        return [_sample_worker(task) for task in tasks]
+
+    try:
+        ctx = mp.get_context(mp_context)
+    except ValueError:
+        ctx = mp.get_context()
+    with ctx.Pool(processes=min(jobs, len(tasks))) as pool:
+        return pool.map(_sample_worker, tasks, chunksize=1)
+
+def rand_sums(num_sums: int, length1: int, length2: int, min1: int, min2: int, max1: int, max2: int, seed: Any = None, jobs: int = 1, mp_context: str = "fork") -> List[Tuple[CombSet, CombSet, CombSet]]:
+    results = []
+    for part in _sample_sums(num_sums, length1, length2, min1, min2, max1, max2, seed, jobs, mp_context, False):
+        results.extend(part)
 
     return(results)
 
-def rand_sets(num_sets: int, length: int, min_val: int, max_val: int) -> List[CombSet]:
+def rand_sum_stats(num_sums: int, length1: int, length2: int, min1: int, min2: int, max1: int, max2: int, seed: Any = None, jobs: int = 1, mp_context: str = "fork") -> Dict[str, np.ndarray]:
+    parts = _sample_sums(num_sums, length1, length2, min1, min2, max1, max2, seed, jobs, mp_context, True)
+    if not parts:
+        return {"sum_card": np.zeros(0, dtype=np.int64), "sum_energy": np.zeros(0, dtype=np.int64)}
+    return {name: np.concatenate([part[name] for part in parts]) for name in ("sum_card", "sum_energy")}
+
+def rand_sets(num_sets: int, length: int, min_val: int, max_val: int, seed: Any = None) -> List[CombSet]:
     sets: List[CombSet] = []
-    for i in range(0, num_sets):
-        S = CombSet([0])
-        S.rand_set(length, min_val, max_val)
-        sets.append(S)
+    for row in rand_rows(seeded_rng(seed), num_sets, length, min_val, max_val):
+        sets.append(CombSet.from_sorted(row))
 
     return sets
 
@@ -0,0 +1,26 @@
+from ookami import CombSet, batch_info
+
+
+def _combset_row(elements):
+    S = CombSet(elements)
+    return [S.cardinality, S.diameter, S.ads_cardinality, S.dds_cardinality, S.mds_cardinality, S.energy_add, S.energy_mult]
+
+
+def _batch_rows(sets):
+    cols = batch_info(sets)
+    return [[int(cols[f][i]) for f in ("cardinality", "diameter", "add_ds_card", "diff_ds_card", "mult_ds_card", "add_energy", "mult_energy")] for i in range(len(sets))]
+
+
+def test_products_beyond_int64():
+    sets = [[2**40, 2**40 + 1, 3 * 2**40], [1, 2, 3]]
+    assert _batch_rows(sets) == [_combset_row(s) for s in sets]
+
+
+def test_int64_max_is_not_padding():
+    sets = [[2**63 - 1, 0], [0, 1, 2, 5]]
+    assert _batch_rows(sets) == [_combset_row(s) for s in sets]
+
+
+def test_object_sets():
+    sets = [CombSet([1, 5, 2**70]), [-2**63, 2**63 - 1], [3, 4]]
+    assert _batch_rows(sets) == [_combset_row(list(s) if isinstance(s, CombSet) else s) for s in sets]
@@ -0,0 +1,10 @@
+from ookami import CombSet, tools
+
+
+def test_load_only_the_last_sweeps_columns(tmp_path):
+    out_dir = str(tmp_path)
+    tools.compute_powerset_info(6, out_dir, 1, 2, 100, output="npy", columns=("add_ds_card", "dc"))
+    tools.compute_powerset_info(6, out_dir, 1, 2, 100, output="npy", columns=("set_cardinality",))
+    cols = tools.load_powerset_info(6, out_dir)
+    assert sorted(cols) == ["set", "set_cardinality"]
+    assert cols["set_cardinality"][0b101101] == CombSet([1, 3, 4, 6]).cardinality
@@ -0,0 +1,90 @@
+from collections import Counter
+from math import comb
+
+import pytest
+
+from ookami import CombSet, set_options
+
+
+def _fold_counts(elements, k, combine):
+    counts = Counter({x: 1 for x in elements})
+    for _ in range(k - 1):
+        step = Counter()
+        for value, count in counts.items():
+            for x in elements:
+                step[combine(value, x)] += count
+        counts = step
+    return counts
+
+
+def test_rep_add_beyond_int64():
+    counts = _fold_counts(range(20), 16, lambda u, v: u + v)
+    S = CombSet(list(range(20)))
+    assert S.rep_add(160, 16) == counts[160]
+    values, reps = S.representation_counts("add", 16)
+    assert dict(zip(map(int, values), map(int, reps))) == counts
+    assert S.k_energy_add(16) == sum(c * c for c in counts.values())
+
+
+def test_binomial_counts_beyond_int64():
+    assert CombSet([0, 1]).rep_add(35, 70) == comb(70, 35)
+    assert CombSet([0, 1]).k_energy_add(70) == comb(140, 70)
+    assert CombSet([0, 1]).k_energy_diff(70) == comb(140, 70)
+    assert CombSet([1, 2]).rep_mult(2**35, 70) == comb(70, 35)
+    assert CombSet([1, 2]).k_energy_mult(70) == comb(140, 70)
+
+
+def test_sparse_counts_beyond_int64():
+    elements = [0, 1, 3, 10**6]
+    counts = _fold_counts(elements, 34, lambda u, v: u + v)
+    values, reps = CombSet(elements).representation_counts("add", 34)
+    assert dict(zip(map(int, values), map(int, reps))) == counts
+
+
+def test_tiled_product_counts_beyond_int64():
+    set_options(block_size=4)
+    try:
+        S = CombSet([1, 2, 3])
+        counts = _fold_counts([1, 2, 3], 45, lambda u, v: u * v)
+        values, reps = S.representation_counts("mult", 45)
+        assert dict(zip(map(int, values), map(int, reps))) == counts
+        assert S.k_energy_mult(45) == sum(c * c for c in counts.values())
+    finally:
+        set_options(block_size=1 << 24)
+
+
+def test_fold_semantics_and_one_off_lookups():
+    S = CombSet([0, 1, 3, 7])
+    assert S.rep_add(3, 1) == 1 and S.rep_add(4, 1) == 0
+    assert S.rep_mult(7, 1) == 1 and S.rep_diff(2, 1) == 0
+    for k in (0, -1):
+        for rep in (S.rep_add, S.rep_diff, S.rep_mult):
+            with pytest.raises(ValueError):
+                rep(3, k)
+
+    assert S.rep_add(7) == 2 and S.rep_diff(-3) == 1 and S.rep_mult(0) == 7
+    assert S.rep_add(10) == 2 and ("add", 2) not in S.rep_hists
+    assert S.k_energy_add(3) == sum(c * c for c in _fold_counts(S, 3, lambda u, v: u + v).values())
+    assert ("add", 3) not in S.rep_hists
+
+    elements = list(range(0, 300, 5)) + [1000]
+    counts = _fold_counts(elements, 2, lambda u, v: u - v)
+    L = CombSet(elements)
+    assert L.rep_diff(-5) == counts[-5]
+    assert ("diff", 2) not in L.rep_hists
+    assert L.rep_diff(805) == counts[805]
+    assert ("diff", 2) in L.rep_hists
+
+
+def test_small_sets_near_int64_bounds():
+    for elements in ([-(2**32), 3, 2**32], [2**31, 3 * 2**31], [-(2**62), 2**62 - 1]):
+        S = CombSet(elements)
+        for op, combine in (("add", lambda u, v: u + v), ("diff", lambda u, v: u - v), ("mult", lambda u, v: u * v)):
+            counts = _fold_counts(elements, 2, combine)
+            rep = getattr(S, "rep_" + op)
+            assert all(rep(x) == c for x, c in counts.items())
+            values, reps = CombSet(elements).representation_counts(op, 2)
+            assert dict(zip(map(int, values), map(int, reps))) == counts
+        assert list(S + S) == sorted(_fold_counts(elements, 2, lambda u, v: u + v))
+        assert list(S - S) == sorted(_fold_counts(elements, 2, lambda u, v: u - v))
+        assert list(S * S) == sorted(_fold_counts(elements, 2, lambda u, v: u * v))
@@ -0,0 +1,27 @@
+import numpy as np
+
+from ookami import rand_sum_stats, rand_sums
+from ookami.tools import _sum_stats
+
+
+def test_int64_max_sum_is_counted():
+    stats = rand_sum_stats(3, 1, 2, 2**62, 2**62 - 2, 2**62, 2**62 - 1, seed=1)
+    assert stats["sum_card"].tolist() == [2, 2, 2]
+    assert stats["sum_energy"].tolist() == [2, 2, 2]
+    stats = _sum_stats(np.array([[0, 2**62]]), np.array([[5, 2**62 - 1]]))
+    assert stats["sum_card"].tolist() == [4]
+
+
+def test_stats_match_sampled_sums():
+    stats = rand_sum_stats(50, 6, 9, -20, 0, 20, 40, seed=7)
+    sums = rand_sums(50, 6, 9, -20, 0, 20, 40, seed=7)
+    assert stats["sum_card"].tolist() == [S.cardinality for _, _, S in sums]
+    assert stats["sum_energy"].tolist() == [_energy(A, B) for A, B, _ in sums]
+
+
+def _energy(A, B):
+    counts = {}
+    for a in A:
+        for b in B:
+            counts[a + b] = counts.get(a + b, 0) + 1
+    return sum(c * c for c in counts.values())
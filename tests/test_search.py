@@ -0,0 +1,7 @@
+from ookami import CombSet, tools
+
+
+def test_search_with_lambdas_under_fork():
+    found = tools.search_powerset(12, 2, 2, predicate=lambda A: A.ads_cardinality <= 10, prune=lambda A: A.ads_cardinality > 10, mp_context="fork")
+    expected = [m for m in range(1, 1 << 12) if CombSet([i + 1 for i in range(12) if m >> i & 1]).ads_cardinality <= 10]
+    assert found == expected
@@ -0,0 +1,17 @@
+import ookami.combset
+from ookami import CombSet
+
+
+def test_linear_growth_reuses_the_streamed_levels(monkeypatch):
+    S = CombSet([0, 3, 7, 11])
+    counts = list(S.iter_sumsets(12, counts=True))
+    level = [0]
+    for k in range(1, 13):
+        level = sorted({x + a for x in level for a in [0, 3, 7, 11]})
+        assert counts[k - 1] == len(level)
+
+    monkeypatch.setattr(ookami.combset, "_sumset", None)
+    slope, constant, start = S.linear_growth(12)
+    assert (slope, constant, start) == (11, -19, 5)
+    assert all(counts[k - 1] == slope * k + constant for k in range(start, 13))
+    assert S.linear_growth(4) is None
@@ -0,0 +1,35 @@
+import threading
+
+from ookami import CombSet, set_options
+from ookami.cache import shared_cache
+from ookami.combset import _map_tiles
+
+
+def test_tiles_in_flight_are_bounded_by_workers():
+    lock = threading.Lock()
+    started = []
+
+    def tile(lo):
+        with lock:
+            started.append(lo)
+        return lo
+
+    set_options(workers=3)
+    try:
+        for consumed, lo in enumerate(_map_tiles(tile, range(20)), 1):
+            assert lo == consumed - 1
+            assert len(started) <= consumed + 2
+    finally:
+        set_options(workers=1)
+
+
+def test_threaded_tiles_match_serial():
+    S = CombSet(list(range(0, 3000, 7)) + [10**9, 10**9 + 5])
+    expected = (S + S, S * S, S.representation_counts("add", 2)[1].tolist())
+    shared_cache.clear()
+    set_options(workers=4, block_size=1000)
+    try:
+        T = CombSet(S._set)
+        assert (T + T, T * T, T.representation_counts("add", 2)[1].tolist()) == expected
+    finally:
+        set_options(workers=1, block_size=1 << 24)